@@ -32,6 +32,7 @@ class BaseStream(BaseModel):
     message_template: str
     modifiers: list[ModifierResp]
     active: bool
+    probabilistic_dedupe: bool = False
 
 
 class StreamBody(BaseStream):
@@ -1,12 +1,21 @@
+import asyncio
+from concurrent.futures import Executor
 from typing import Any, AsyncGenerator, Callable
 
 import httpx
 from picodi import Provide, SingletonScope, dependency, inject
 from redis import asyncio as aioredis
 
+from feed_watchdog import http
 from feed_watchdog.api_client.client import FeedWatchdogAPIClient
+from feed_watchdog.handlers import executor
+from feed_watchdog.handlers.parsers import reddit_json
 from feed_watchdog.pubsub.publisher import Publisher
-from feed_watchdog.repositories.post import RedisPostRepository
+from feed_watchdog.repositories.post import (
+    RedisBloomPostRepository,
+    RedisPostRepository,
+    RedisSortedSetPostRepository,
+)
 from feed_watchdog.synchronize import lock
 from feed_watchdog.workers.settings import Settings, get_settings
 
@@ -53,6 +62,78 @@ async def init_lock(
     return lock.init(redis)
 
 
+@dependency(scope_class=SingletonScope)
+@inject
+async def get_feeds_http_client(
+    settings: Settings = Provide(get_settings),
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    client = http.create_client(
+        timeout=settings.http.timeout,
+        max_connections=settings.http.max_connections,
+        max_keepalive_connections=settings.http.max_keepalive_connections,
+        http2=settings.http.http2,
+    )
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+@inject
+def get_validators_cache(
+    redis: aioredis.Redis = Provide(get_storage_redis_client),
+    settings: Settings = Provide(get_settings),
+) -> http.ValidatorsCache | None:
+    if not settings.http.conditional_requests:
+        return None
+    return http.ValidatorsCache(redis_client=redis, ttl=settings.http.validators_ttl)
+
+
+@inject
+async def init_http_client(
+    client: httpx.AsyncClient = Provide(get_feeds_http_client),
+    validators_cache: http.ValidatorsCache | None = Provide(get_validators_cache),
+    settings: Settings = Provide(get_settings),
+) -> None:
+    return http.init_client(
+        client,
+        max_connections_per_host=settings.http.max_connections_per_host,
+        validators_cache=validators_cache,
+    )
+
+
+@dependency(scope_class=SingletonScope)
+@inject
+async def get_parsers_executor(
+    settings: Settings = Provide(get_settings),
+) -> AsyncGenerator[Executor | None, None]:
+    if not settings.parsers.process_pool:
+        yield None  # default executor of the event loop
+        return
+    pool = executor.create_process_pool(
+        max_workers=settings.parsers.max_workers or None,
+        max_tasks_per_child=settings.parsers.max_tasks_per_child or None,
+    )
+    try:
+        yield pool
+    finally:
+        # don't block event loop while running tasks are finishing
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+
+@inject
+async def init_parsers_executor(
+    pool: Executor | None = Provide(get_parsers_executor),
+    settings: Settings = Provide(get_settings),
+) -> None:
+    return executor.init_executor(pool, timeout=settings.parsers.timeout or None)
+
+
+@inject
+def init_json_codec(settings: Settings = Provide(get_settings)) -> None:
+    reddit_json.init_codec(settings.parsers.json_codec)
+
+
 @dependency(scope_class=SingletonScope)
 @inject
 async def get_pub_sub_redis_client(
@@ -68,8 +149,13 @@ async def get_pub_sub_redis_client(
 @inject
 def get_publisher(
     redis: aioredis.Redis = Provide(get_pub_sub_redis_client),
+    settings: Settings = Provide(get_settings),
 ) -> Publisher:
-    return Publisher(redis_client=redis)
+    return Publisher(
+        redis_client=redis,
+        message_format=settings.pubsub.message_format,
+        compress_threshold=settings.pubsub.compress_threshold,
+    )
 
 
 @inject
@@ -83,5 +169,24 @@ def get_feed_watchdog_api_client(
 @inject
 def get_post_repository(
     redis: aioredis.Redis = Provide(get_storage_redis_client),
+    settings: Settings = Provide(get_settings),
 ) -> RedisPostRepository:
+    if settings.seen_posts.storage == "sorted_set":
+        return RedisSortedSetPostRepository(
+            client=redis,
+            max_age=settings.seen_posts.retention_days * 24 * 60 * 60,
+            max_posts=settings.seen_posts.max_per_stream,
+        )
     return RedisPostRepository(client=redis)
+
+
+@inject
+def get_bloom_post_repository(
+    redis: aioredis.Redis = Provide(get_storage_redis_client),
+    settings: Settings = Provide(get_settings),
+) -> RedisBloomPostRepository:
+    return RedisBloomPostRepository(
+        client=redis,
+        capacity=settings.seen_posts.bloom_initial_capacity,
+        error_rate=settings.seen_posts.bloom_error_rate,
+    )
@@ -6,11 +6,17 @@ from pathlib import Path
 
 import picodi
 from picodi import Provide, inject
+from prometheus_client import start_http_server
 
 from feed_watchdog.commands.core import choose_and_setup_command, find_commands_in_dir
 from feed_watchdog.handlers import init_handlers_config
 from feed_watchdog.sentry.setup import setup_logging as setup_sentry_logging
-from feed_watchdog.workers.dependencies import init_lock
+from feed_watchdog.workers.dependencies import (
+    init_http_client,
+    init_json_codec,
+    init_lock,
+    init_parsers_executor,
+)
 from feed_watchdog.workers.settings import Settings, get_settings
 
 CURR_DIR = Path(__file__).parent
@@ -26,6 +32,9 @@ async def main() -> None:
     )
     await picodi.init_dependencies()
     await init_lock()
+    await init_http_client()
+    await init_parsers_executor()
+    init_json_codec()
 
     parser = argparse.ArgumentParser()
     worker, args = choose_and_setup_command(
@@ -45,6 +54,8 @@ async def main() -> None:
 def setup(settings: Settings = Provide(get_settings)) -> None:
     setup_sentry_logging(settings.sentry.dsn)
     init_handlers_config(settings.app.handlers_conf_path)
+    if settings.metrics.port:
+        start_http_server(settings.metrics.port)
 
     logging.basicConfig(
         level=logging.INFO,
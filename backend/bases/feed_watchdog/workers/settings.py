@@ -1,5 +1,7 @@
 from functools import lru_cache
+from typing import Literal
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from feed_watchdog.domain.models import BaseModel
@@ -12,13 +14,132 @@ class AppSettings(BaseModel):
     handlers_conf_path: str = "/app/fw_handlers_conf.yaml"
     streams_topic: str = "feed_watchdog:streams"
     messages_topic: str = "feed_watchdog:messages"
+    # how many streams fetch_posts_from_streams worker processes simultaneously
+    fetch_concurrency: int = 10
+    # how many compiled stream pipelines (resolved handlers) to keep
+    pipelines_cache_size: int = 1000
+    # how many messages send_messages worker reads and acknowledges at once
+    send_batch_size: int = 100
+    # how many events publish_streams_by_schedule worker sends in one
+    #   round trip to redis
+    publish_chunk_size: int = 500
 
 
 class RedisSettings(BaseModel):
+    # fetch_posts_from_streams worker publishes messages and marks posts
+    #   as seen in one transaction only if pub/sub client and storage
+    #   are the same redis database, otherwise messages are published first
+    #   and can be sent twice if marking of posts fails
     storage_url: str = "redis://redis:6379/1"
     pub_sub_url: str = "redis://redis:6379/2"
 
 
+class TopicTrimSettings(BaseModel):
+    # approximate limits of acknowledged messages kept in the topic,
+    #   0 - unlimited
+    max_len: int = 0
+    max_age: int = 24 * 60 * 60  # seconds
+
+
+class PubSubSettings(BaseModel):
+    # id of the worker in consumer groups, "{hostname}" is replaced with
+    #   the host name and "{pid}" with the process id; must be unique among
+    #   running replicas of the worker, so don't pin hostnames of scaled
+    #   containers (add "{pid}" if replicas share the host), ids that
+    #   stay the same after restart (e.g. "{hostname}" of stateful pods)
+    #   let restarted worker continue its pending messages right away
+    consumer_id: str = "{hostname}"
+    # consumers idle longer than this (ms) are considered dead, their pending
+    #   messages are claimed and they are deleted from consumer groups,
+    #   0 - never
+    dead_consumer_idle_time: int = 60 * 1000
+    # "fields" - every key of the message is a separate stream field,
+    # "envelope" - whole message in one (optionally compressed) field,
+    #   consumers must be updated before switching to it
+    message_format: Literal["fields", "envelope"] = "fields"
+    # compress envelope bigger than this size in bytes, 0 - never
+    compress_threshold: int = 4096
+    # how long subscribers wait for new messages in one read (ms)
+    read_block_timeout: int = 5000
+    # how often subscribers claim stuck messages of other consumers
+    #   (seconds), 0 - never
+    check_backlog_interval: float = 10
+    # how often fetch_posts_from_streams worker resets idle time of messages
+    #   it is still working on (seconds), must be less than 60 seconds
+    #   after which they are claimed by other consumers, 0 - never
+    heartbeat_interval: float = 20
+    # messages that failed (or weren't acknowledged) this many times are moved
+    #   to "<topic>:dead" stream, see `dead_letters` command, 0 - never
+    max_deliveries: int = 5
+    # topics are trimmed by publish_streams_by_schedule worker, messages that
+    #   are pending or not yet read by any consumer group are never trimmed
+    streams_topic_trim: TopicTrimSettings = TopicTrimSettings()
+    messages_topic_trim: TopicTrimSettings = TopicTrimSettings()
+    # how often topics are trimmed and their length and memory are reported
+    #   (seconds), 0 - never
+    maintenance_interval: float = 60
+
+
+MIN_SEEN_POSTS_PER_STREAM = 500
+
+
+class SeenPostsSettings(BaseModel):
+    # "set" - keep ids of all seen posts forever
+    # "sorted_set" - keep ids with the time they were last seen in the feed
+    #   and trim old ones (run migrate_seen_posts before switching)
+    storage: Literal["set", "sorted_set"] = "set"
+    retention_days: int = 365  # 0 - unlimited
+    # 0 - unlimited, otherwise it must be well above the number of posts
+    #   in any feed, or posts still in the feed are trimmed and sent again
+    max_per_stream: int = 10000
+    # used for streams with `probabilistic_dedupe` enabled; bloom filter
+    #   scripts access keys of filter layers not declared in KEYS, so
+    #   these streams don't work with redis cluster and ACL key patterns
+    bloom_initial_capacity: int = 10000
+    bloom_error_rate: float = 0.001
+
+    @field_validator("max_per_stream")
+    @classmethod
+    def check_max_per_stream(cls, value: int) -> int:
+        if 0 < value < MIN_SEEN_POSTS_PER_STREAM:
+            raise ValueError(
+                f"must be 0 (unlimited) or at least {MIN_SEEN_POSTS_PER_STREAM}"
+            )
+        return value
+
+
+class HttpSettings(BaseModel):
+    timeout: float = 30.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    max_connections_per_host: int = 10
+    # requires h2 package to be installed (httpx[http2])
+    http2: bool = False
+    # send If-None-Match/If-Modified-Since and skip not modified feeds
+    conditional_requests: bool = True
+    validators_ttl: int = 7 * 24 * 60 * 60  # seconds
+
+
+class ParsersSettings(BaseModel):
+    # run parsers in dedicated process pool instead of default thread pool
+    process_pool: bool = False
+    max_workers: int = 0  # 0 - number of CPUs
+    max_tasks_per_child: int = 0  # 0 - unlimited, requires python 3.11+
+    timeout: float = 0  # seconds, 0 - unlimited
+    # stop parsing of the feed after this number of consecutive seen posts
+    #   (feeds are expected to be sorted from newest to oldest),
+    #   works only with parsers that support lazy parsing, 0 - parse whole feed
+    stop_after_seen: int = 0
+    # json codec of reddit_json parser: "stream" drops unused objects while
+    #   decoding, "orjson" is faster but keeps whole document (if installed)
+    json_codec: Literal["stream", "orjson"] = "stream"
+
+
+class MetricsSettings(BaseModel):
+    # port for prometheus metrics endpoint, 0 - disabled
+    port: int = 0
+
+
 class SentrySettings(BaseModel):
     dsn: str = ""
 
@@ -26,6 +147,11 @@ class SentrySettings(BaseModel):
 class Settings(BaseSettings):
     app: AppSettings
     redis: RedisSettings = RedisSettings()
+    pubsub: PubSubSettings = PubSubSettings()
+    seen_posts: SeenPostsSettings = SeenPostsSettings()
+    http: HttpSettings = HttpSettings()
+    parsers: ParsersSettings = ParsersSettings()
+    metrics: MetricsSettings = MetricsSettings()
     sentry: SentrySettings = SentrySettings()
 
     model_config = SettingsConfigDict(
@@ -0,0 +1,82 @@
+import logging
+import textwrap
+from argparse import ArgumentParser
+
+from picodi import Provide, inject
+from redis import asyncio as aioredis
+
+from feed_watchdog.commands.core import BaseCommand
+from feed_watchdog.pubsub.dead_letters import list_dead_letters, replay_dead_letter
+from feed_watchdog.workers.dependencies import get_pub_sub_redis_client
+from feed_watchdog.workers.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLettersCommand(BaseCommand):
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument("action", choices=["list", "replay"])
+        parser.add_argument(
+            "topic",
+            choices=["streams", "messages"],
+            help="Topic of fetch_posts_from_streams or send_messages worker",
+        )
+        parser.add_argument(
+            "--id",
+            action="append",
+            dest="ids",
+            help="Id of the dead letter to replay (all by default), can be repeated",
+        )
+        parser.add_argument("--count", type=int, help="Max number of dead letters")
+
+    async def handle(self, args) -> None:
+        if args.action == "list":
+            await print_dead_letters(topic=args.topic, count=args.count)
+        else:
+            await replay_dead_letters(topic=args.topic, ids=args.ids, count=args.count)
+
+
+@inject
+async def print_dead_letters(
+    topic: str,
+    count: int | None,
+    settings: Settings = Provide(get_settings),
+    redis: aioredis.Redis = Provide(get_pub_sub_redis_client),
+) -> None:
+    topic_name = _topic_name(topic, settings)
+    for dead_letter in await list_dead_letters(redis, topic_name, count=count):
+        print(
+            f"{dead_letter.id} (message {dead_letter.message_id},"
+            f" group {dead_letter.group}, {dead_letter.deliveries} deliveries)"
+        )
+        print(f"  fields: {dead_letter.fields}")
+        print(textwrap.indent(dead_letter.error.strip(), "  "))
+
+
+@inject
+async def replay_dead_letters(
+    topic: str,
+    ids: list[str] | None,
+    count: int | None,
+    settings: Settings = Provide(get_settings),
+    redis: aioredis.Redis = Provide(get_pub_sub_redis_client),
+) -> None:
+    topic_name = _topic_name(topic, settings)
+    replayed = 0
+    for dead_letter in await list_dead_letters(redis, topic_name, count=count):
+        if ids and dead_letter.id not in ids:
+            continue
+        try:
+            new_id = await replay_dead_letter(redis, topic_name, dead_letter)
+        except ValueError as e:
+            logger.warning("Dead letter %s is not replayed: %s", dead_letter.id, e)
+            continue
+        logger.info("Replayed dead letter %s as %s", dead_letter.id, new_id)
+        replayed += 1
+    logger.info("Replayed %s dead letters to %s", replayed, topic_name)
+
+
+def _topic_name(topic: str, settings: Settings) -> str:
+    if topic == "streams":
+        return settings.app.streams_topic
+    return settings.app.messages_topic
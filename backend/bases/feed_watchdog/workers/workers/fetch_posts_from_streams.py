@@ -1,28 +1,50 @@
+import asyncio
+import hashlib
 import logging
-import uuid
-from dataclasses import asdict
-from typing import Sequence
+import traceback
+from contextlib import aclosing
+from typing import Literal, Sequence
 
 from picodi import Provide, inject
+from prometheus_client import Counter
+from redis import asyncio as aioredis
 
 from feed_watchdog.commands.core import BaseCommand
-from feed_watchdog.domain.events import (
-    Message,
-    MessageBatch,
-    ModifierData,
-    ProcessStreamEvent,
-)
-from feed_watchdog.domain.models import Post
-from feed_watchdog.handlers import HandlerType, get_handler_by_name
+from feed_watchdog.domain.events import Message, MessageBatch, ProcessStreamEvent
+from feed_watchdog.domain.models import NOT_MODIFIED, FetchedText, FetchResult, Post
+from feed_watchdog.handlers.pipeline import Pipeline, PipelinesCache
+from feed_watchdog.http import ValidatorsCache
 from feed_watchdog.pubsub.publisher import Publisher
-from feed_watchdog.pubsub.subscriber import Subscriber
-from feed_watchdog.repositories.post import RedisPostRepository
+from feed_watchdog.pubsub.subscriber import Subscriber, make_consumer_id
+from feed_watchdog.repositories.post import (
+    RedisBloomPostRepository,
+    RedisPostRepository,
+)
 from feed_watchdog.sentry.error_tracking import write_warn_message
-from feed_watchdog.workers.dependencies import get_post_repository, get_publisher
+from feed_watchdog.workers.dependencies import (
+    get_bloom_post_repository,
+    get_post_repository,
+    get_pub_sub_redis_client,
+    get_publisher,
+    get_storage_redis_client,
+    get_validators_cache,
+)
 from feed_watchdog.workers.settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+content_digest_checks = Counter(
+    "fetched_content_digest_checks",
+    "Checks of fetched content against digest of the previous fetch",
+    ["result"],
+    namespace="feed_watchdog",
+)
+duplicate_fetches = Counter(
+    "duplicate_stream_fetches",
+    "Stream events processed more than once (acknowledged by another consumer)",
+    namespace="feed_watchdog",
+)
+
 
 class ProcessStreamsByScheduleWorker(BaseCommand):
     @inject
@@ -30,30 +52,143 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
         self,
         settings: Settings = Provide(get_settings),
         post_repository: RedisPostRepository = Provide(get_post_repository),
+        bloom_post_repository: RedisBloomPostRepository = Provide(
+            get_bloom_post_repository
+        ),
         publisher: Publisher = Provide(get_publisher),
+        redis: aioredis.Redis = Provide(get_pub_sub_redis_client),
+        storage_redis: aioredis.Redis = Provide(get_storage_redis_client),
+        validators_cache: ValidatorsCache | None = Provide(get_validators_cache),
     ) -> None:
         self._settings = settings
         self._post_repository = post_repository
+        self._bloom_post_repository = bloom_post_repository
         self._publisher = publisher
+        self._redis = redis
+        self._storage_redis = storage_redis
+        self._validators_cache = validators_cache
+        # messages and seen posts are written in one transaction only
+        #   if publisher and post repositories use the same redis database
+        self._atomic_writes = _same_database(redis, storage_redis)
+        if not self._atomic_writes:
+            logger.warning(
+                "Pub/sub and storage are different redis databases, messages"
+                " can be sent twice if marking of posts as seen fails"
+            )
+        self._pipelines = PipelinesCache(maxsize=settings.app.pipelines_cache_size)
         self._subscriber = Subscriber(
+            redis_client=redis,
             topic_name=self._settings.app.streams_topic,
             group_id="fetch_posts_from_streams",
-            consumer_id=uuid.uuid4().hex,
+            consumer_id=make_consumer_id(self._settings.pubsub.consumer_id),
+            # don't take more messages than can be processed at once,
+            #   so they don't wait in the pending list of this consumer
+            messages_per_read=settings.app.fetch_concurrency,
+            read_block_timeout=self._settings.pubsub.read_block_timeout,
+            check_backlog_interval=self._settings.pubsub.check_backlog_interval,
+            dead_consumer_idle_time=self._settings.pubsub.dead_consumer_idle_time,
+            max_deliveries=self._settings.pubsub.max_deliveries,
         )
+        # ids of processed messages waiting for acknowledgement
+        self._processed_ids: list[str] = []
+        self._commit_task: asyncio.Task | None = None
+        # ids of received messages that are queued or being processed
+        self._held_ids: set[str] = set()
 
     async def handle(self, args) -> None:  # noqa: U100
         await self.process_streams()
 
     async def process_streams(self) -> None:
         logger.info("Start processing streams for fetching")
-        async for msg_id, msg_data in self._subscriber:
+        concurrency = self._settings.app.fetch_concurrency
+        in_flight: set[asyncio.Task] = set()
+        heartbeat = asyncio.create_task(self.keep_held_messages())
+        # messages are read only for free slots, so this consumer
+        #   doesn't hold more than `concurrency` messages at once
+        batches = self._subscriber.iter_batches(
+            capacity=lambda: concurrency - len(in_flight)
+        )
+        try:
+            async with aclosing(batches):
+                async for batch in batches:
+                    self._held_ids.update(msg_id for msg_id, _ in batch)
+                    for msg_id, msg_data in batch:
+                        await _wait_for_free_slot(in_flight, concurrency)
+                        task = asyncio.create_task(
+                            self.process_message(msg_id, msg_data)
+                        )
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
+                    await _wait_for_free_slot(in_flight, concurrency)
+        finally:
+            heartbeat.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            if self._commit_task:
+                await self._commit_task
+            await self.commit_processed()
+
+    async def process_message(self, msg_id: str, msg_data: dict) -> None:
+        try:
             event = ProcessStreamEvent.from_dict(msg_data)
             await self.process_event(event)
-            await self._subscriber.commit(msg_id)
+        except Exception:  # noqa: PIE786
+            # message stays in pending list and will be picked up
+            #   again from the backlog until it's moved to dead letters
+            logger.exception("Failed to process message %s", msg_id)
+            await self.fail_message(msg_id, traceback.format_exc())
+            return
+        finally:
+            self._held_ids.discard(msg_id)
+        self.commit_later(msg_id)
+
+    async def fail_message(self, msg_id: str, error: str) -> None:
+        try:
+            await self._subscriber.fail(msg_id, error)
+        except Exception:  # noqa: PIE786
+            logger.exception("Failed to mark message %s as failed", msg_id)
+
+    async def keep_held_messages(self) -> None:
+        """Periodically reset idle time of messages that are not processed yet"""
+        interval = self._settings.pubsub.heartbeat_interval
+        if not interval:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._subscriber.touch(list(self._held_ids))
+            except Exception:  # noqa: PIE786
+                logger.exception("Failed to reset idle time of messages")
+
+    def commit_later(self, msg_id: str) -> None:
+        """
+        Acknowledge message in the background. Ids of messages processed
+        while previous XACK is in flight are acknowledged with one next XACK.
+        """
+        self._processed_ids.append(msg_id)
+        if self._commit_task is None or self._commit_task.done():
+            self._commit_task = asyncio.create_task(self.commit_processed())
+
+    async def commit_processed(self) -> None:
+        while self._processed_ids:
+            msg_ids, self._processed_ids = self._processed_ids, []
+            try:
+                committed = await self._subscriber.commit_many(msg_ids)
+            except Exception:  # noqa: PIE786
+                # messages will be processed again from the backlog
+                logger.exception("Failed to commit %s messages", len(msg_ids))
+                continue
+            duplicate_fetches.inc(len(msg_ids) - committed)
 
     async def process_event(self, event: ProcessStreamEvent) -> None:
-        text = await self.fetch_text(event)
-        if not text:
+        pipeline = self._pipelines.get(
+            event.source, event.modifiers, event.message_template
+        )
+        fetched = await self.fetch_text(event, pipeline)
+        if fetched is NOT_MODIFIED:
+            logger.info("Content for %s is not modified", event.slug)
+            return
+        if fetched is None or not fetched.text:
             logger.warning(
                 "Can't fetch text for %s",
                 event.slug,
@@ -65,7 +200,17 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
             )
             return
 
-        posts = await self.parse_posts(event, text)
+        text = fetched.text
+        digest = _content_digest(text)
+        if digest == await self._post_repository.get_content_digest(event.slug):
+            content_digest_checks.labels(result="hit").inc()
+            logger.info("Content for %s is not changed", event.slug)
+            # the same content was already processed
+            await self.save_validators(event, fetched)
+            return
+        content_digest_checks.labels(result="miss").inc()
+
+        posts = await self.parse_posts(event, pipeline, text)
         if not posts:
             logger.warning(
                 "Can't parse posts for %s",
@@ -79,72 +224,137 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
             )
             return
 
-        final_posts = await self.apply_modifiers_to_posts(event.modifiers, posts)
+        final_posts = await pipeline.modify(posts)
         events_for_sending = await self.parse_new_events(event, final_posts)
         post_ids = [
             msg.post_id for event in events_for_sending for msg in event.messages
         ]
         logger.info("Sending %s events for %s", len(events_for_sending), event.slug)
-        await self.send_events(events_for_sending)
+        # mark all parsed posts from the feed at once, so posts that are
+        #   still in the feed are never trimmed from seen posts
+        #   (the tail of the feed skipped by `stop_after_seen` is not updated)
+        seen_post_ids = {post.post_id for post in posts} | set(post_ids)
+        if self._atomic_writes:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                await self.send_events(events_for_sending, pipe)
+                await self.mark_processed(event, fetched, seen_post_ids, digest, pipe)
+                await pipe.execute()
+            return
 
-        if left_posts := {post.post_id for post in posts} - set(post_ids):
-            await self._post_repository.mark_post_as_seen(event.slug, *left_posts)
+        # messages are published first, so if marking of posts fails
+        #   they are sent again on retry instead of being lost
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await self.send_events(events_for_sending, pipe)
+            await pipe.execute()
+        async with self._storage_redis.pipeline(transaction=True) as pipe:
+            await self.mark_processed(event, fetched, seen_post_ids, digest, pipe)
+            await pipe.execute()
 
-    async def fetch_text(self, event: ProcessStreamEvent) -> str | None:
-        fetcher = get_handler_by_name(
-            type=HandlerType.fetchers.value,
-            name=event.source.fetcher_type,
-            options=event.source.fetcher_options,
+    async def mark_processed(
+        self,
+        event: ProcessStreamEvent,
+        fetched: FetchedText,
+        seen_post_ids: set[str],
+        digest: str,
+        pipe: aioredis.client.Pipeline,
+    ) -> None:
+        seen_posts_repository = self._get_seen_posts_repository(event)
+        await seen_posts_repository.with_client(pipe).mark_post_as_seen(
+            event.slug, *seen_post_ids
         )
-        return await fetcher()
-
-    async def parse_posts(self, event: ProcessStreamEvent, text: str) -> list[Post]:
-        parser = get_handler_by_name(
-            name=event.source.parser_type,
-            type=HandlerType.parsers.value,
-            options=event.source.parser_options,
+        await self._post_repository.with_client(pipe).save_content_digest(
+            event.slug, digest
         )
-        posts = await parser(text)
+        # saved only with processed content, so it's fetched again
+        #   if processing fails
+        await self.save_validators(event, fetched, pipe)
+
+    async def save_validators(
+        self,
+        event: ProcessStreamEvent,
+        fetched: FetchedText,
+        pipe: aioredis.client.Pipeline | None = None,
+    ) -> None:
+        if self._validators_cache is not None and fetched.url:
+            await self._validators_cache.save(
+                event.slug, fetched.url, fetched.validators, pipe=pipe
+            )
+
+    async def fetch_text(
+        self, event: ProcessStreamEvent, pipeline: Pipeline
+    ) -> FetchedText | None | Literal[FetchResult.NOT_MODIFIED]:
+        # content can be not modified only relative to the previous fetch
+        #   of the same stream, so use stream slug as a cache key
+        result = await pipeline.fetch(cache_key=event.slug)
+        if isinstance(result, str):
+            # fetchers without validators
+            return FetchedText(text=result)
+        return result
+
+    async def parse_posts(
+        self, event: ProcessStreamEvent, pipeline: Pipeline, text: str
+    ) -> list[Post]:
+        if stop_after_seen := self._settings.parsers.stop_after_seen:
+            return await self.parse_posts_until_seen(
+                event, pipeline, text, stop_after_seen
+            )
+        posts = await pipeline.parse(text)
         mutate_posts_with_stream_data(event, posts)
         return posts
 
-    async def apply_modifiers_to_posts(
-        self, modifiers: list[ModifierData], posts: list[Post]
+    async def parse_posts_until_seen(
+        self,
+        event: ProcessStreamEvent,
+        pipeline: Pipeline,
+        text: str,
+        stop_after_seen: int,
     ) -> list[Post]:
-        for modifier in modifiers:
-            modifier_func = get_handler_by_name(
-                name=modifier.type,
-                type=HandlerType.modifiers.value,
-                options=modifier.options,
-            )
-            posts = await modifier_func(posts)
+        seen_posts_repository = self._get_seen_posts_repository(event)
+        posts: list[Post] = []
+        consecutive_seen = 0
+        batches = pipeline.iter_parse(text, batch_size=stop_after_seen)
+        async with aclosing(batches):
+            async for batch in batches:
+                mutate_posts_with_stream_data(event, batch)
+                unseen_post_ids = await seen_posts_repository.filter_unseen(
+                    event.slug, (post.post_id for post in batch)
+                )
+                for post in batch:
+                    posts.append(post)
+                    if post.post_id in unseen_post_ids:
+                        consecutive_seen = 0
+                    else:
+                        consecutive_seen += 1
+                    if consecutive_seen >= stop_after_seen:
+                        return posts
         return posts
 
     async def parse_new_events(
         self, event: ProcessStreamEvent, posts: list[Post]
     ) -> list[MessageBatch]:
+        seen_posts_repository = self._get_seen_posts_repository(event)
         has_posts = bool(
-            await self._post_repository.seen_posts_count(stream_id=event.slug)
+            await seen_posts_repository.seen_posts_count(stream_id=event.slug)
         )
-        messages = []
-        for post in reversed(posts):
-            if not has_posts:  # first run, don't send all posts in stream
+        if not has_posts:  # first run, don't send all posts in stream
+            if posts:
                 write_warn_message(f"First run for {event.slug}", logger.warning)
-                break
-            if await self._post_repository.is_post_seen(
-                post.post_id, stream_id=event.slug
-            ):
-                continue
+            return []
 
-            messages.append(
-                Message(
-                    post_id=post.post_id,
-                    # TODO: text deprecated, remove in future
-                    text="",
-                    template=event.message_template,
-                    template_kwargs=post.template_kwargs(),
-                )
+        unseen_post_ids = await seen_posts_repository.filter_unseen(
+            event.slug, (post.post_id for post in posts)
+        )
+        messages = [
+            Message(
+                post_id=post.post_id,
+                # TODO: text deprecated, remove in future
+                text="",
+                template=event.message_template,
+                template_kwargs=post.template_kwargs(),
             )
+            for post in reversed(posts)
+            if post.post_id in unseen_post_ids
+        ]
 
         if not messages:
             return []
@@ -156,16 +366,37 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
             for message in messages
         ]
 
-    async def send_events(self, events_for_sending: list[MessageBatch]) -> None:
+    def _get_seen_posts_repository(
+        self, event: ProcessStreamEvent
+    ) -> RedisPostRepository:
+        if event.probabilistic_dedupe:
+            return self._bloom_post_repository
+        return self._post_repository
+
+    async def send_events(
+        self, events_for_sending: list[MessageBatch], pipe: aioredis.client.Pipeline
+    ) -> None:
+        publisher = self._publisher.with_client(pipe)
         for event in events_for_sending:
-            await self._publisher.publish(
-                self._settings.app.messages_topic, data=asdict(event)
-            )
-            await self._post_repository.mark_post_as_seen(
-                event.stream_slug, *[msg.post_id for msg in event.messages]
+            await publisher.publish(
+                self._settings.app.messages_topic, data=event.as_dict()
             )
 
 
+def _same_database(first: aioredis.Redis, second: aioredis.Redis) -> bool:
+    first_kwargs = first.connection_pool.connection_kwargs
+    second_kwargs = second.connection_pool.connection_kwargs
+    return all(
+        first_kwargs.get(name) == second_kwargs.get(name)
+        for name in ("host", "port", "path", "db")
+    )
+
+
+async def _wait_for_free_slot(tasks: set[asyncio.Task], limit: int) -> None:
+    while len(tasks) >= limit:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+
 def mutate_posts_with_stream_data(
     stream: ProcessStreamEvent,
     posts: Sequence[Post],
@@ -175,5 +406,9 @@ def mutate_posts_with_stream_data(
         post.source_tags = stream.source.tags
 
 
+def _content_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
 def _clean_post_id(post_id: str) -> str:
     return post_id.removeprefix("https://").removeprefix("http://")
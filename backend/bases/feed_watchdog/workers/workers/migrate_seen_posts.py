@@ -0,0 +1,44 @@
+import logging
+from argparse import ArgumentParser
+
+from picodi import Provide, inject
+from redis import asyncio as aioredis
+
+from feed_watchdog.commands.core import BaseCommand
+from feed_watchdog.repositories.post import (
+    RedisPostRepository,
+    RedisSortedSetPostRepository,
+)
+from feed_watchdog.workers.dependencies import get_storage_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class MigrateSeenPostsCommand(BaseCommand):
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--delete-sets",
+            action="store_true",
+            help="Delete old sets after migration",
+        )
+
+    async def handle(self, args) -> None:
+        await migrate_seen_posts(delete_sets=args.delete_sets)
+
+
+@inject
+async def migrate_seen_posts(
+    delete_sets: bool,
+    redis: aioredis.Redis = Provide(get_storage_redis_client),
+) -> None:
+    set_repository = RedisPostRepository(client=redis)
+    # trimming will be done on the next write with settings from config
+    sorted_set_repository = RedisSortedSetPostRepository(client=redis)
+    streams = 0
+    async for stream_id in set_repository.iter_streams_with_seen_posts():
+        copied = await sorted_set_repository.migrate_from_set(
+            stream_id, delete_source=delete_sets
+        )
+        logger.info("Migrated %s seen posts for %s", copied, stream_id)
+        streams += 1
+    logger.info("Migrated seen posts for %s streams", streams)
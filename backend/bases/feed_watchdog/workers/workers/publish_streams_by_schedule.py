@@ -5,26 +5,45 @@ from typing import Iterable
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from picodi import Provide, inject
+from prometheus_client import Gauge
+from redis import asyncio as aioredis
 
 from feed_watchdog.api_client.client import FeedWatchdogAPIClient
 from feed_watchdog.commands.core import BaseCommand
 from feed_watchdog.domain.events import ProcessStreamEvent
 from feed_watchdog.pubsub.publisher import Publisher
+from feed_watchdog.pubsub.trimming import safe_trim, stream_stats
 from feed_watchdog.workers.dependencies import (
     get_feed_watchdog_api_client,
+    get_pub_sub_redis_client,
     get_publisher,
 )
 from feed_watchdog.workers.settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+topic_length = Gauge(
+    "pubsub_topic_length",
+    "Number of messages in the topic stream",
+    ["topic"],
+    namespace="feed_watchdog",
+)
+topic_memory = Gauge(
+    "pubsub_topic_memory_bytes",
+    "Memory used by the topic stream",
+    ["topic"],
+    namespace="feed_watchdog",
+)
+
 
 class ProcessStreamsByScheduleWorker(BaseCommand):
     async def handle(self, args) -> None:  # noqa: U100
         logger.info("Starting scheduler")
         scheduler = AsyncIOScheduler()
         await add_interval_jobs(scheduler)
+        add_maintenance_job(scheduler)
         scheduler.start()
         while True:
             await asyncio.sleep(1000)
@@ -45,6 +64,51 @@ async def add_interval_jobs(
         )
 
 
+@inject
+def add_maintenance_job(
+    scheduler: AsyncIOScheduler,
+    settings: Settings = Provide(get_settings),
+) -> None:
+    if not settings.pubsub.maintenance_interval:
+        return
+    scheduler.add_job(
+        maintain_topics,
+        IntervalTrigger(seconds=settings.pubsub.maintenance_interval),
+        name="maintain_topics",
+        replace_existing=True,
+    )
+
+
+@inject
+async def maintain_topics(
+    settings: Settings = Provide(get_settings),
+    redis: aioredis.Redis = Provide(get_pub_sub_redis_client),
+) -> None:
+    """Trim acknowledged messages of topics and report their size"""
+    topics = [
+        (settings.app.streams_topic, settings.pubsub.streams_topic_trim),
+        (settings.app.messages_topic, settings.pubsub.messages_topic_trim),
+    ]
+    for topic_name, trim in topics:
+        try:
+            await safe_trim(
+                redis, topic_name, max_len=trim.max_len, max_age=trim.max_age
+            )
+            stats = await stream_stats(redis, topic_name)
+        except Exception:  # noqa: PIE786
+            logger.exception("Failed to maintain topic %s", topic_name)
+            continue
+        logger.info(
+            "Topic %s: %s messages, %s bytes",
+            topic_name,
+            stats.length,
+            stats.memory,
+        )
+        topic_length.labels(topic=topic_name).set(stats.length)
+        if stats.memory is not None:
+            topic_memory.labels(topic=topic_name).set(stats.memory)
+
+
 @inject
 async def collect_and_publish_streams(
     cron_interval: str,
@@ -64,8 +128,11 @@ async def send_events(
     topic_name,
     events: Iterable[ProcessStreamEvent],
     publisher: Publisher = Provide(get_publisher),
+    settings: Settings = Provide(get_settings),
 ) -> None:
-    i = 0
-    for i, event in enumerate(events, start=1):  # noqa: B007
-        await publisher.publish(topic_name, event.as_dict())
-    logger.info("Sent %s events", i)
+    sent = await publisher.publish_many(
+        topic_name,
+        (event.as_dict() for event in events),
+        chunk_size=settings.app.publish_chunk_size,
+    )
+    logger.info("Sent %s events", sent)
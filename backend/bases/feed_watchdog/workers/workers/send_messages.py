@@ -1,5 +1,5 @@
 import logging
-import uuid
+import traceback
 
 from picodi import Provide, inject
 
@@ -7,7 +7,7 @@ from feed_watchdog.api_client.client import FeedWatchdogAPIClient, StreamResp
 from feed_watchdog.commands.core import BaseCommand
 from feed_watchdog.domain.events import MessageBatch
 from feed_watchdog.handlers import HandlerType, get_handler_by_name
-from feed_watchdog.pubsub.subscriber import Subscriber
+from feed_watchdog.pubsub.subscriber import Subscriber, make_consumer_id
 from feed_watchdog.workers.dependencies import get_feed_watchdog_api_client
 from feed_watchdog.workers.settings import Settings, get_settings
 
@@ -26,7 +26,11 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
         self._subscriber = Subscriber(
             topic_name=self._settings.app.messages_topic,
             group_id="send_messages",
-            consumer_id=uuid.uuid4().hex,
+            consumer_id=make_consumer_id(self._settings.pubsub.consumer_id),
+            read_block_timeout=self._settings.pubsub.read_block_timeout,
+            check_backlog_interval=self._settings.pubsub.check_backlog_interval,
+            dead_consumer_idle_time=self._settings.pubsub.dead_consumer_idle_time,
+            max_deliveries=self._settings.pubsub.max_deliveries,
         )
 
     async def handle(self, args) -> None:  # noqa: U100
@@ -34,29 +38,48 @@ class ProcessStreamsByScheduleWorker(BaseCommand):
 
     async def process_messages(self) -> None:
         logger.info("Start processing messages for sending")
-        async for msg_id, msg_data in self._subscriber:
-            message_batch = MessageBatch.from_dict(msg_data)
-            stream = await self.receive_stream(message_batch.stream_slug)
-            if not stream:
-                logger.warning("Can't find stream %s", message_batch.stream_slug)
-                await self._subscriber.commit(msg_id)
-                continue
-
-            receiver = get_handler_by_name(
-                name=stream.receiver.type,
-                type=HandlerType.receivers.value,
-                options={
-                    **stream.receiver.options,
-                    **stream.receiver_options_override,
-                },
-            )
-            await receiver(message_batch.messages)
-            await self._subscriber.commit(msg_id)
-            logger.info(
-                "Message batch sent to %s (%s)",
-                stream.receiver.type,
-                message_batch.stream_slug,
-            )
+        batches = self._subscriber.iter_batches(
+            max_size=self._settings.app.send_batch_size
+        )
+        async for batch in batches:
+            processed = []
+            try:
+                for msg_id, msg_data in batch:
+                    try:
+                        await self.process_message(msg_data)
+                    except Exception:  # noqa: PIE786
+                        # message stays in pending list and will be sent again
+                        #   from the backlog until it's moved to dead letters
+                        logger.exception("Failed to send message %s", msg_id)
+                        await self._subscriber.fail(msg_id, traceback.format_exc())
+                        continue
+                    processed.append(msg_id)
+            finally:
+                # acknowledge messages that are already sent
+                #   even if sending of the next one failed
+                await self._subscriber.commit_many(processed)
+
+    async def process_message(self, msg_data: dict) -> None:
+        message_batch = MessageBatch.from_dict(msg_data)
+        stream = await self.receive_stream(message_batch.stream_slug)
+        if not stream:
+            logger.warning("Can't find stream %s", message_batch.stream_slug)
+            return
+
+        receiver = get_handler_by_name(
+            name=stream.receiver.type,
+            type=HandlerType.receivers.value,
+            options={
+                **stream.receiver.options,
+                **stream.receiver_options_override,
+            },
+        )
+        await receiver(message_batch.messages)
+        logger.info(
+            "Message batch sent to %s (%s)",
+            stream.receiver.type,
+            message_batch.stream_slug,
+        )
 
     async def receive_stream(self, stream_slug: str) -> StreamResp | None:
         # TODO: cache for 10 minutes
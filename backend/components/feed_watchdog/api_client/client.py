@@ -41,6 +41,7 @@ class StreamResp(BaseModel):
     message_template: str
     modifiers: list[ModifierResp]
     active: bool
+    probabilistic_dedupe: bool = False
     source: SourceResp
     receiver: ReceiverResp
 
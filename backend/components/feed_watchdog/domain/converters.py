@@ -0,0 +1,169 @@
+"""
+Converters of dataclasses to/from dicts, generated once per class.
+
+Faster replacement of `dacite.from_dict` and `dataclasses.asdict`
+for simple event dataclasses. Decoders check types the same way dacite
+does (with its default config) and raise the same exceptions.
+Encoders don't copy values of `dict` and `list` fields.
+
+Supported field types: str, bool, int, float, dict, list,
+dataclass and list of dataclasses.
+"""
+import dataclasses
+import typing
+from collections.abc import Mapping
+from functools import cache
+from typing import Any, Callable
+
+from dacite import DaciteFieldError, MissingValueError, WrongTypeError
+
+Decoder = Callable[[Mapping[str, Any]], Any]
+Encoder = Callable[[Any], dict[str, Any]]
+
+_SIMPLE_TYPES = (str, bool, int, float, dict, list)
+
+
+def compile_decoder(cls: type) -> Decoder:
+    """Function that makes instance of `cls` from dict (cached per class)"""
+    return _compile_decoder(cls)
+
+
+def compile_encoder(cls: type) -> Encoder:
+    """Function that makes dict from instance of `cls` (cached per class)"""
+    return _compile_encoder(cls)
+
+
+@cache
+def _compile_decoder(cls: type) -> Decoder:
+    namespace: dict[str, Any] = {
+        "cls": cls,
+        "Mapping": Mapping,
+        "DaciteFieldError": DaciteFieldError,
+        "MissingValueError": MissingValueError,
+        "WrongTypeError": WrongTypeError,
+    }
+    lines = [
+        "def decode(data):",
+        "    if data.__class__ is not dict and not isinstance(data, Mapping):",
+        "        raise WrongTypeError(field_type=cls, value=data)",
+    ]
+    for i, (field, field_type) in enumerate(_fields(cls)):
+        var = f"value_{i}"
+        namespace[f"type_{i}"] = field_type
+        lines += _get_value_lines(field, var, namespace, i)
+        lines += _check_value_lines(field.name, field_type, var, namespace, i)
+    args = ", ".join(f"value_{i}" for i in range(len(dataclasses.fields(cls))))
+    lines.append(f"    return cls({args})")
+    return _exec(lines, namespace, "decode")
+
+
+@cache
+def _compile_encoder(cls: type) -> Encoder:
+    namespace: dict[str, Any] = {}
+    items = []
+    for i, (field, field_type) in enumerate(_fields(cls)):
+        value = f"obj.{field.name}"
+        nested = _nested_dataclass(field_type)
+        if nested is not None:
+            namespace[f"encode_{i}"] = _compile_encoder(nested)
+            if nested is field_type:
+                value = f"encode_{i}({value})"
+            else:
+                value = f"[encode_{i}(item) for item in {value}]"
+        items.append(f"{field.name!r}: {value}")
+    lines = ["def encode(obj):", f"    return {{{', '.join(items)}}}"]
+    return _exec(lines, namespace, "encode")
+
+
+def _fields(cls: type) -> list[tuple[dataclasses.Field, Any]]:
+    type_hints = typing.get_type_hints(cls)
+    result = []
+    for field in dataclasses.fields(cls):
+        field_type = type_hints[field.name]
+        if field_type not in _SIMPLE_TYPES and _nested_dataclass(field_type) is None:
+            raise TypeError(
+                f"Unsupported type of field {cls.__name__}.{field.name}: {field_type}"
+            )
+        result.append((field, field_type))
+    return result
+
+
+def _nested_dataclass(field_type: Any) -> type | None:
+    """Dataclass itself for dataclass and list of dataclasses types"""
+    if typing.get_origin(field_type) is list:
+        (field_type,) = typing.get_args(field_type)
+    if isinstance(field_type, type) and dataclasses.is_dataclass(field_type):
+        return field_type
+    return None
+
+
+def _get_value_lines(
+    field: dataclasses.Field, var: str, namespace: dict[str, Any], i: int
+) -> list[str]:
+    if field.default is not dataclasses.MISSING:
+        namespace[f"default_{i}"] = field.default
+        return [f"    {var} = data.get({field.name!r}, default_{i})"]
+    if field.default_factory is not dataclasses.MISSING:
+        namespace[f"default_factory_{i}"] = field.default_factory
+        return [
+            f"    {var} = (",
+            f"        data[{field.name!r}] if {field.name!r} in data",
+            f"        else default_factory_{i}()",
+            "    )",
+        ]
+    return [
+        "    try:",
+        f"        {var} = data[{field.name!r}]",
+        "    except KeyError:",
+        f"        raise MissingValueError({field.name!r}) from None",
+    ]
+
+
+def _check_value_lines(
+    name: str, field_type: Any, var: str, namespace: dict[str, Any], i: int
+) -> list[str]:
+    wrong_type = (
+        f"raise WrongTypeError(field_type=type_{i}, value={var}, field_path={name!r})"
+    )
+    nested = _nested_dataclass(field_type)
+    if nested is None:
+        return [f"    if not isinstance({var}, type_{i}):", f"        {wrong_type}"]
+
+    namespace[f"nested_{i}"] = nested
+    namespace[f"decode_{i}"] = _compile_decoder(nested)
+    if nested is field_type:
+        return [
+            f"    if not isinstance({var}, nested_{i}):",
+            *_with_path(name, [f"{var} = decode_{i}({var})"], indent=8),
+        ]
+    return [
+        f"    if not isinstance({var}, list):",
+        f"        {wrong_type}",
+        *_with_path(
+            name,
+            [
+                f"{var} = [",
+                f"    item if isinstance(item, nested_{i}) else decode_{i}(item)",
+                f"    for item in {var}",
+                "]",
+            ],
+            indent=4,
+        ),
+    ]
+
+
+def _with_path(name: str, body: list[str], indent: int) -> list[str]:
+    """Add name of the field to the path of errors of nested dataclasses"""
+    prefix = " " * indent
+    return [
+        f"{prefix}try:",
+        *(f"{prefix}    {line}" for line in body),
+        f"{prefix}except DaciteFieldError as e:",
+        f"{prefix}    e.update_path({name!r})",
+        f"{prefix}    raise",
+    ]
+
+
+def _exec(lines: list[str], namespace: dict[str, Any], name: str) -> Any:
+    exec("\n".join(lines), namespace)  # noqa: S102
+    return namespace[name]
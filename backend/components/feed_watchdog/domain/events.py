@@ -1,19 +1,24 @@
 import dataclasses
 from typing import Any
 
-from dacite import from_dict
+from feed_watchdog.domain.converters import (
+    Decoder,
+    Encoder,
+    compile_decoder,
+    compile_encoder,
+)
 
 
 @dataclasses.dataclass
 class Event:
     def as_dict(self) -> dict:
-        data = dataclasses.asdict(self)
+        data = _encoders[type(self)](self)
         data["__event_name__"] = type(self).__name__
         return data
 
     @classmethod
     def from_dict(cls, data: dict):
-        return from_dict(data_class=cls, data=data)
+        return _decoders[cls](data)
 
 
 def parse_event(message: dict[str, Any]) -> Event:
@@ -49,6 +54,7 @@ class ProcessStreamEvent(Event):
     squash: bool
     modifiers: list[ModifierData]
     source: SourceData
+    probabilistic_dedupe: bool = False
 
 
 @dataclasses.dataclass
@@ -63,3 +69,11 @@ class Message:
 class MessageBatch(Event):
     stream_slug: str
     messages: list[Message]
+
+
+_encoders: dict[type, Encoder] = {
+    cls: compile_encoder(cls) for cls in Event.__subclasses__()
+}
+_decoders: dict[type, Decoder] = {
+    cls: compile_decoder(cls) for cls in Event.__subclasses__()
+}
@@ -1,4 +1,5 @@
 import dataclasses
+from enum import Enum
 from typing import Protocol
 
 from dacite import from_dict
@@ -55,6 +56,8 @@ class BaseStream(BaseModel):
     message_template: str
     modifiers: list[Modifier] = []
     active: bool
+    # keep seen posts in bloom filter (not supported by redis cluster)
+    probabilistic_dedupe: bool = False
 
 
 class Stream(BaseStream):
@@ -69,6 +72,8 @@ class StreamWithRelations(Stream):
 
 @dataclasses.dataclass()
 class Post(Protocol):
+    __slots__ = ("post_id", "source_tags")
+
     post_id: str
     source_tags: tuple | list
 
@@ -82,3 +87,24 @@ class Post(Protocol):
     @classmethod
     def from_dict(cls, data: dict):
         return from_dict(cls, data=data)
+
+
+class FetchResult(Enum):
+    NOT_MODIFIED = "not_modified"
+
+
+# returned by fetchers when content is not changed since the last fetch
+NOT_MODIFIED = FetchResult.NOT_MODIFIED
+
+
+@dataclasses.dataclass(frozen=True)
+class FetchedText:
+    """
+    Text returned by fetchers with validators of the response (ETag and
+    Last-Modified). Validators must be saved only after the text is processed,
+    otherwise the next fetch returns `NOT_MODIFIED` for unprocessed content.
+    """
+
+    text: str
+    url: str = ""
+    validators: dict[str, str] = dataclasses.field(default_factory=dict)
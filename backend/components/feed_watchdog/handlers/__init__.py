@@ -4,12 +4,23 @@ import dataclasses
 import importlib
 import os
 import pkgutil
+import weakref
 from collections import defaultdict
 from enum import Enum
 from functools import partial
 from inspect import isclass
 from pathlib import Path
-from typing import Any, Callable, NamedTuple, Optional, Type, TypedDict
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Type,
+    TypedDict,
+)
 
 import yaml
 
@@ -21,6 +32,12 @@ __all__ = [
     "HandlerType",
     "init_handlers_config",
     "get_handler_return_model_by_name",
+    "HandlersRegistry",
+    "get_handlers_registry",
+    "invalidate_handlers_registry",
+    "register_dependent_cache",
+    "lazy_parser",
+    "get_lazy_parser_by_name",
 ]
 
 from feed_watchdog.domain.models import Post
@@ -122,6 +139,7 @@ def init_handlers_config(path_to_config: Path | str, env_prefix: str = "FW_HNDR_
 
         with open(path_to_config) as conf:
             HANDLERS_CONFIG = yaml.safe_load(conf)
+        invalidate_handlers_registry()
 
 
 def _yaml_string_constructor(self, node, env_prefix):
@@ -177,6 +195,7 @@ def register_handler(
                 return_model,
             )
 
+        invalidate_handlers_registry()
         return func_or_class
 
     return wrapper
@@ -190,29 +209,90 @@ def load_handlers() -> None:
         _load_modules(package)
 
 
-def get_registered_handlers() -> dict[str, dict[str, Handler]]:
-    load_handlers()
-
-    result = {}
-    for handler_type, handlers in HANDLERS.items():
-        result[handler_type] = {
-            name: Handler(
-                name_,
-                obj if kwargs is None else obj(**kwargs),
-                options_class,
-                return_fields_schema,
-                return_model,
-            )
-            for name, (
-                name_,
-                obj,
-                kwargs,
-                options_class,
-                return_fields_schema,
-                return_model,
-            ) in handlers.items()
+class HandlersRegistry:
+    """
+    Frozen snapshot of registered handlers indexed by (type, name).
+    Class-based handlers are instantiated on first use and then reused.
+    """
+
+    def __init__(self, handlers: dict[str, dict[str, RawHandler]]):
+        self._types = tuple(handlers)
+        self._handlers = MappingProxyType(
+            {
+                (handler_type, name): raw_handler
+                for handler_type, type_handlers in handlers.items()
+                for name, raw_handler in type_handlers.items()
+            }
+        )
+        self._instances: dict[tuple[str, str], Handler] = {}
+
+    def get(self, type: str, name: str) -> Handler:
+        key = (type, name)
+        try:
+            return self._instances[key]
+        except KeyError:
+            pass
+        (
+            name_,
+            obj,
+            kwargs,
+            options_class,
+            return_fields_schema,
+            return_model,
+        ) = self._handlers[key]
+        handler = Handler(
+            name_,
+            obj if kwargs is None else obj(**kwargs),
+            options_class,
+            return_fields_schema,
+            return_model,
+        )
+        self._instances[key] = handler
+        return handler
+
+    def as_dict(self) -> dict[str, dict[str, Handler]]:
+        result: dict[str, dict[str, Handler]] = {
+            handler_type: {} for handler_type in self._types
         }
-    return result
+        for handler_type, name in self._handlers:
+            result[handler_type][name] = self.get(handler_type, name)
+        return result
+
+
+class DependentCache(Protocol):
+    def clear(self) -> None:
+        ...
+
+
+_registry: HandlersRegistry | None = None
+# caches of objects built from handlers (e.g. compiled pipelines),
+#   they are cleared together with the registry
+_dependent_caches: weakref.WeakSet[DependentCache] = weakref.WeakSet()
+
+
+def get_handlers_registry() -> HandlersRegistry:
+    global _registry
+    if _registry is None:
+        load_handlers()
+        _registry = HandlersRegistry(HANDLERS)
+    return _registry
+
+
+def invalidate_handlers_registry() -> None:
+    """Registry will be rebuilt (and handlers re-instantiated) on next lookup"""
+    global _registry
+    _registry = None
+    for cache in list(_dependent_caches):
+        cache.clear()
+
+
+def register_dependent_cache(cache: DependentCache) -> None:
+    """Clear `cache` whenever handlers registry is invalidated"""
+    _dependent_caches.add(cache)
+
+
+def get_registered_handlers() -> dict[str, dict[str, Handler]]:
+    return get_handlers_registry().as_dict()
 
 
 def _load_modules(package) -> None:
@@ -226,8 +306,7 @@ def _parse_modules(package) -> list[str]:
 
 
 def get_handler_by_name(type: str, name: str, options: Optional[dict] = None) -> Any:
-    registered_handlers = get_registered_handlers()
-    handler = dict(registered_handlers[type])[name]
+    handler = get_handlers_registry().get(type, name)
     options_ = None
     if options and handler.options_class:
         options_ = handler.options_class(**options)
@@ -235,13 +314,39 @@ def get_handler_by_name(type: str, name: str, options: Optional[dict] = None) ->
 
 
 def get_handler_return_model_by_name(type: str, name: str) -> ReturnModel:
-    registered_handlers = get_registered_handlers()
-    handler = dict(registered_handlers[type])[name]
+    handler = get_handlers_registry().get(type, name)
     if handler.return_model is None:
         raise ValueError(f"Handler {name} does not have return model")
     return handler.return_model
 
 
+LazyParser = Callable[..., Iterator[Post]]
+
+
+def lazy_parser(iter_posts: LazyParser):
+    """
+    Attach generator version of the parser, which yields posts
+    one by one in order of the feed (it's executed in a thread)
+    """
+
+    def wrapper(func):
+        func.iter_posts = iter_posts
+        return func
+
+    return wrapper
+
+
+def get_lazy_parser_by_name(
+    name: str, options: Optional[dict] = None
+) -> Optional[LazyParser]:
+    parser = get_handler_by_name(
+        type=HandlerType.parsers.value, name=name, options=options
+    )
+    if iter_posts := getattr(parser.func, "iter_posts", None):
+        return partial(iter_posts, **parser.keywords)
+    return None
+
+
 Schema = TypedDict(
     "Schema",
     {
@@ -0,0 +1,49 @@
+"""
+Executor for CPU-bound work of handlers (e.g. parsing of large feeds).
+By default default thread pool of the event loop is used,
+dedicated process pool can be set with `init_executor`.
+"""
+import asyncio
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+_executor: Executor | None = None
+_timeout: float | None = None
+
+
+def create_process_pool(
+    max_workers: int | None = None, max_tasks_per_child: int | None = None
+) -> ProcessPoolExecutor:
+    kwargs: dict[str, Any] = {}
+    if max_tasks_per_child:
+        if sys.version_info < (3, 11):
+            raise ValueError("max_tasks_per_child requires python 3.11+")
+        kwargs["max_tasks_per_child"] = max_tasks_per_child
+    return ProcessPoolExecutor(max_workers=max_workers, **kwargs)
+
+
+def init_executor(executor: Executor | None, timeout: float | None = None) -> None:
+    global _executor, _timeout
+    _executor = executor
+    _timeout = timeout
+
+
+def is_process_pool() -> bool:
+    """Functions and arguments passed to process pool must be picklable"""
+    return isinstance(_executor, ProcessPoolExecutor)
+
+
+async def run_in_executor(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run function in the executor. Function and its arguments must be picklable.
+    Raises `asyncio.TimeoutError` if the function is not finished in time
+    (process itself is not interrupted, so it still occupies a worker).
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, func, *args)
+    if _timeout:
+        return await asyncio.wait_for(future, _timeout)
+    return await future
@@ -1,12 +1,23 @@
 import dataclasses
 import logging
+from typing import Literal
 
+from prometheus_client import Counter
+
+from feed_watchdog.domain.models import NOT_MODIFIED, FetchedText, FetchResult
 from feed_watchdog.handlers import HandlerOptions, HandlerType, register_handler
-from feed_watchdog.http import domain_from_url, fetch_text_from_url
+from feed_watchdog.http import domain_from_url, fetch_from_url
 from feed_watchdog.synchronize.lock import async_lock
 
 logger = logging.getLogger(__name__)
 
+conditional_requests = Counter(
+    "fetch_text_conditional_requests",
+    "Conditional requests made by fetch_text handler",
+    ["result"],
+    namespace="feed_watchdog",
+)
+
 
 @dataclasses.dataclass
 class FetchTextOptions(HandlerOptions):
@@ -19,7 +30,15 @@ class FetchTextOptions(HandlerOptions):
     encoding: str = ""
 
 
-@async_lock(key=lambda options: domain_from_url(options.url))
+@async_lock(key=lambda options, **_: domain_from_url(options.url))
 @register_handler(type=HandlerType.fetchers.value, options=FetchTextOptions)
-async def fetch_text(*, options: FetchTextOptions) -> str | None:
-    return await fetch_text_from_url(options.url, encoding=options.encoding, retry=2)
+async def fetch_text(
+    *, options: FetchTextOptions, cache_key: str = ""
+) -> FetchedText | None | Literal[FetchResult.NOT_MODIFIED]:
+    result = await fetch_from_url(
+        options.url, encoding=options.encoding, retry=2, cache_key=cache_key
+    )
+    if cache_key and result is not None:
+        cache_result = "hit" if result is NOT_MODIFIED else "miss"
+        conditional_requests.labels(result=cache_result).inc()
+    return result
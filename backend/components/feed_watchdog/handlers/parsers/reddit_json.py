@@ -1,15 +1,22 @@
 import dataclasses
 import json
 import logging
+from typing import Callable
 
 from feed_watchdog.domain.models import Post as BasePost
 from feed_watchdog.handlers import HandlerType, register_handler
-from feed_watchdog.text import make_hash_tags
+from feed_watchdog.handlers.executor import run_in_executor
+from feed_watchdog.text import join_tags
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class Post(BasePost):
     post_id: str
     title: str
@@ -19,14 +26,15 @@ class Post(BasePost):
     source_tags: tuple | list
 
     def template_kwargs(self):
+        source_tags, source_hash_tags = join_tags(tuple(self.source_tags))
         return {
             "post_id": self.post_id,
             "title": self.title,
             "url": self.url,
             "comments": self.comments,
             "score": self.score,
-            "source_tags": "; ".join(self.source_tags),
-            "source_hash_tags": " ".join(make_hash_tags(self.source_tags)),
+            "source_tags": source_tags,
+            "source_hash_tags": source_hash_tags,
         }
 
     @classmethod
@@ -48,15 +56,71 @@ class Post(BasePost):
     return_model=Post,
 )
 async def reddit_json(text: str, *, options=None) -> list[Post]:  # noqa: U100
-    raw_post = json.loads(text)
+    rows = await run_in_executor(_decoders[_codec], text)
     return [
         Post(
-            post_id=entry["data"]["id"],
-            title=entry["data"]["title"],
-            url=entry["data"]["url"],
-            comments=f"https://reddit.com{entry['data']['permalink']}",
-            score=entry["data"]["score"],
-            source_tags=[],
+            post_id=post_id,
+            title=title,
+            url=url,
+            comments=f"https://reddit.com{permalink}",
+            score=score,
+            source_tags=(),
         )
-        for entry in raw_post["data"]["children"]
+        for post_id, title, url, permalink, score in rows
+    ]
+
+
+# id, title, url, permalink, score
+PostRow = tuple[str, str, str, str, int]
+
+POST_FIELDS = ("id", "title", "url", "permalink", "score")
+
+_codec = "stream"
+
+
+def init_codec(codec: str) -> None:
+    """
+    stream - stdlib decoder that drops unused objects while decoding,
+        so the whole tree is never kept in memory
+    orjson - faster, but decodes the whole document (if orjson is installed)
+    """
+    global _codec
+    if codec not in _decoders:
+        raise ValueError(f"Unknown or not installed json codec: {codec}")
+    _codec = codec
+
+
+def _rows(listing: dict) -> list[PostRow]:
+    return [
+        tuple(entry["data"][field] for field in POST_FIELDS)
+        for entry in listing["data"]["children"]
     ]
+
+
+def _prune(obj: dict) -> dict | None:
+    # called for every decoded object, innermost first,
+    #   so only the path to post fields survives
+    if "children" in obj:  # listing data
+        return {"children": obj["children"]}
+    if "kind" in obj and "data" in obj:  # listing or post
+        return {"data": obj["data"]}
+    # post data, "permalink" is checked first as the rarest key
+    if "permalink" in obj and all(field in obj for field in POST_FIELDS):
+        return {field: obj[field] for field in POST_FIELDS}
+    return None
+
+
+_pruning_decoder = json.JSONDecoder(object_hook=_prune)
+
+
+def _decode_stream(text: str) -> list[PostRow]:
+    return _rows(_pruning_decoder.decode(text))
+
+
+def _decode_orjson(text: str) -> list[PostRow]:
+    return _rows(orjson.loads(text))
+
+
+_decoders: dict[str, Callable[[str], list[PostRow]]] = {"stream": _decode_stream}
+if orjson is not None:
+    _decoders["orjson"] = _decode_orjson
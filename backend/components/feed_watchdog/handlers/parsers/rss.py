@@ -2,17 +2,19 @@ import asyncio
 import dataclasses
 import json
 import logging
+from typing import Callable
 
 import feedparser
 
 from feed_watchdog.domain.models import Post as BasePost
 from feed_watchdog.handlers import HandlerType, register_handler
-from feed_watchdog.text import make_hash_tags
+from feed_watchdog.handlers.executor import run_in_executor
+from feed_watchdog.text import join_tags, make_hash_tags
 
 logger = logging.getLogger(__name__)
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class Post(BasePost):
     post_id: str
     title: str
@@ -22,15 +24,16 @@ class Post(BasePost):
     source_tags: tuple | list
 
     def template_kwargs(self):
+        source_tags, source_hash_tags = join_tags(tuple(self.source_tags))
         return {
             "post_id": self.post_id,
             "title": self.title,
             "url": self.url,
             "comments_url": self.comments_url,
             "post_tags": "; ".join(self.post_tags),
-            "source_tags": "; ".join(self.source_tags),
+            "source_tags": source_tags,
             "post_hash_tags": " ".join(make_hash_tags(self.post_tags)),
-            "source_hash_tags": " ".join(make_hash_tags(self.source_tags)),
+            "source_hash_tags": source_hash_tags,
         }
 
     @classmethod
@@ -53,12 +56,40 @@ class Post(BasePost):
     return_model=Post,
 )
 async def rss(text: str, *, options=None) -> list[Post]:  # noqa: U100
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _handler, text)
+    return await parse_in_executor(parse_feed, text)
 
 
-def _handler(text: str) -> list[Post]:
-    posts: list[Post] = []
+# post_id, title, url, comments_url, post_tags
+PostRow = tuple[str, str, str, str, tuple[str, ...]]
+
+
+async def parse_in_executor(
+    parse_func: Callable[[str], list[PostRow]], text: str
+) -> list[Post]:
+    try:
+        rows = await run_in_executor(parse_func, text)
+    except asyncio.TimeoutError:
+        logger.exception("Timeout while parsing feed")
+        return []
+    return [post_from_row(row) for row in rows]
+
+
+def post_from_row(row: PostRow) -> Post:
+    post_id, title, url, comments_url, post_tags = row
+    return Post(
+        post_id=post_id,
+        title=title,
+        url=url,
+        comments_url=comments_url,
+        post_tags=post_tags,
+        source_tags=(),
+    )
+
+
+def parse_feed(text: str) -> list[PostRow]:
+    # returns tuples instead of Post objects, because they are smaller
+    #   to pickle when handler is executed in a process pool
+    posts: list[PostRow] = []
 
     if not text:
         return posts
@@ -73,13 +104,12 @@ def _handler(text: str) -> list[Post]:
         try:
             id_field = entry.keymap["guid"]
             posts.append(
-                Post(
-                    post_id=entry.get(id_field) or entry.link,
-                    title=entry.title,
-                    url=entry.get("link"),
-                    comments_url=entry.get("comments"),
-                    post_tags=get_tags(entry),
-                    source_tags=[],
+                (
+                    entry.get(id_field) or entry.link,
+                    entry.title,
+                    entry.get("link"),
+                    entry.get("comments"),
+                    get_tags(entry),
                 ),
             )
         except Exception:  # noqa: PIE786
@@ -0,0 +1,464 @@
+"""
+Fast parser of RSS 2.0 and Atom feeds built on the streaming XML parser
+from the standard library.
+It extracts only fields of the rss `Post` and mirrors feedparser's rules
+for them, so results of `rss` and `rss_fast` parsers are the same.
+Everything this parser doesn't understand (DTDs, xml:base, non utf-8 encodings,
+html in titles, malformed xml, etc.) is delegated to feedparser.
+"""
+import logging
+import re
+from functools import lru_cache
+from typing import Iterator
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+from feed_watchdog.handlers import HandlerType, lazy_parser, register_handler
+from feed_watchdog.handlers.parsers.rss import (
+    Post,
+    PostRow,
+    parse_feed,
+    parse_in_executor,
+    post_from_row,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# namespaces known by feedparser 6.0 (`_FeedParserMixin.namespaces`): uri -> prefix,
+#   empty prefix means that elements are treated as plain ones;
+#   copied because the mixin is private api of feedparser
+FEEDPARSER_NAMESPACES = {
+    "": "",
+    "http://backend.userland.com/rss": "",
+    "http://blogs.law.harvard.edu/tech/rss": "",
+    "http://purl.org/rss/1.0/": "",
+    "http://my.netscape.com/rdf/simple/0.9/": "",
+    "http://example.com/newformat#": "",
+    "http://example.com/necho": "",
+    "http://purl.org/echo/": "",
+    "uri/of/echo/namespace#": "",
+    "http://purl.org/pie/": "",
+    "http://purl.org/atom/ns#": "",
+    "http://www.w3.org/2005/Atom": "",
+    "http://purl.org/rss/1.0/modules/rss091#": "",
+    "http://webns.net/mvcb/": "admin",
+    "http://purl.org/rss/1.0/modules/aggregation/": "ag",
+    "http://purl.org/rss/1.0/modules/annotate/": "annotate",
+    "http://media.tangent.org/rss/1.0/": "audio",
+    "http://backend.userland.com/blogChannelModule": "blogChannel",
+    "http://creativecommons.org/ns#license": "cc",
+    "http://web.resource.org/cc/": "cc",
+    "http://cyber.law.harvard.edu/rss/creativeCommonsRssModule.html": "creativeCommons",
+    "http://backend.userland.com/creativeCommonsRssModule": "creativeCommons",
+    "http://purl.org/rss/1.0/modules/company": "co",
+    "http://purl.org/rss/1.0/modules/content/": "content",
+    "http://my.theinfo.org/changed/1.0/rss/": "cp",
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://purl.org/dc/terms/": "dcterms",
+    "http://purl.org/rss/1.0/modules/email/": "email",
+    "http://purl.org/rss/1.0/modules/event/": "ev",
+    "http://rssnamespace.org/feedburner/ext/1.0": "feedburner",
+    "http://freshmeat.net/rss/fm/": "fm",
+    "http://xmlns.com/foaf/0.1/": "foaf",
+    "http://www.w3.org/2003/01/geo/wgs84_pos#": "geo",
+    "http://www.georss.org/georss": "georss",
+    "http://www.opengis.net/gml": "gml",
+    "http://postneo.com/icbm/": "icbm",
+    "http://purl.org/rss/1.0/modules/image/": "image",
+    "http://www.itunes.com/DTDs/PodCast-1.0.dtd": "itunes",
+    "http://example.com/DTDs/PodCast-1.0.dtd": "itunes",
+    "http://purl.org/rss/1.0/modules/link/": "l",
+    "http://search.yahoo.com/mrss": "media",
+    "http://search.yahoo.com/mrss/": "media",
+    "http://madskills.com/public/xml/rss/module/pingback/": "pingback",
+    "http://prismstandard.org/namespaces/1.2/basic/": "prism",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+    "http://www.w3.org/2000/01/rdf-schema#": "rdfs",
+    "http://purl.org/rss/1.0/modules/reference/": "ref",
+    "http://purl.org/rss/1.0/modules/richequiv/": "reqv",
+    "http://purl.org/rss/1.0/modules/search/": "search",
+    "http://purl.org/rss/1.0/modules/slash/": "slash",
+    "http://schemas.xmlsoap.org/soap/envelope/": "soap",
+    "http://purl.org/rss/1.0/modules/servicestatus/": "ss",
+    "http://hacks.benhammersley.com/rss/streaming/": "str",
+    "http://purl.org/rss/1.0/modules/subscription/": "sub",
+    "http://purl.org/rss/1.0/modules/syndication/": "sy",
+    "http://schemas.pocketsoap.com/rss/myDescModule/": "szf",
+    "http://purl.org/rss/1.0/modules/taxonomy/": "taxo",
+    "http://purl.org/rss/1.0/modules/threading/": "thr",
+    "http://purl.org/rss/1.0/modules/textinput/": "ti",
+    "http://madskills.com/public/xml/rss/module/trackback/": "trackback",
+    "http://wellformedweb.org/commentAPI/": "wfw",
+    "http://purl.org/rss/1.0/modules/wiki/": "wiki",
+    "http://www.w3.org/1999/xhtml": "xhtml",
+    "http://www.w3.org/1999/xlink": "xlink",
+    "http://www.w3.org/XML/1998/namespace": "xml",
+    "http://podlove.org/simple-chapters": "psc",
+}
+_NAMESPACE_PREFIXES = {
+    uri.lower(): prefix for uri, prefix in FEEDPARSER_NAMESPACES.items()
+}
+_XML_NAMESPACE = "{http://www.w3.org/XML/1998/namespace}"
+_RDF_ABOUT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+
+_ENTRY_TAGS = frozenset({"item", "entry"})
+_TITLE_TAGS = frozenset({"title", "dc:title", "media:title"})
+_ID_TAGS = frozenset({"guid", "id"})
+# tag name -> default scheme
+_CATEGORY_TAGS = {
+    "category": None,
+    "keywords": None,
+    "dc:subject": None,
+    "media:category": "http://search.yahoo.com/mrss/category_schema",
+}
+_HANDLED_TAGS = _ENTRY_TAGS | _ID_TAGS | {"link", "comments", *_CATEGORY_TAGS}
+_UNSUPPORTED_TAGS = frozenset(
+    {"tags", "media:keywords", "itunes:keywords", "itunes:category"}
+)
+# local names of elements which can affect result, when prefixed or not
+_RELEVANT_LOCAL_NAMES = frozenset(
+    {
+        "item",
+        "entry",
+        "title",
+        "guid",
+        "id",
+        "link",
+        "comments",
+        "category",
+        "keywords",
+        "tags",
+        "source",
+    }
+)
+_HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+
+_XML_DECLARATION = re.compile(r"<\?xml[^>]*?encoding=[\"']([^\"']*)[\"']")
+_URI_FIXER = re.compile(r"^([A-Za-z][A-Za-z0-9+-.]*://)(/*)(.*?)")
+_LINK_QUERY_FIXER = re.compile(r"&([A-Za-z0-9_]+);")
+_LOOKS_LIKE_HTML = re.compile(r"</\w+>|&#?\w+;")
+_CP1252 = {
+    code: bytes([code]).decode("cp1252")
+    for code in range(128, 160)
+    if code not in (0x81, 0x8D, 0x8F, 0x90, 0x9D)
+}
+
+
+class FallbackRequired(Exception):
+    pass
+
+
+def _iter_posts(text: str, *, options=None) -> Iterator[Post]:  # noqa: U100
+    seen_ids = set()
+    try:
+        for row in iter_fast(text):
+            seen_ids.add(row[0])
+            yield post_from_row(row)
+        return
+    except (FallbackRequired, ParseError) as e:
+        logger.debug("Fallback to feedparser: %s", e)
+    except Exception:  # noqa: PIE786
+        logger.exception("Failed to parse feed with fast parser")
+    # fast parser can fail in the middle of the feed,
+    #   so skip posts that were already yielded
+    for row in parse_feed(text):
+        if row[0] not in seen_ids:
+            yield post_from_row(row)
+
+
+@register_handler(
+    type=HandlerType.parsers.value,
+    return_fields_schema=Post.fields_schema(),
+    return_model=Post,
+)
+@lazy_parser(_iter_posts)
+async def rss_fast(text: str, *, options=None) -> list[Post]:  # noqa: U100
+    return await parse_in_executor(_handler, text)
+
+
+def _handler(text: str) -> list[PostRow]:
+    try:
+        return parse_fast(text)
+    except (FallbackRequired, ParseError) as e:
+        logger.debug("Fallback to feedparser: %s", e)
+    except Exception:  # noqa: PIE786
+        logger.exception("Failed to parse feed with fast parser")
+    return parse_feed(text)
+
+
+def parse_fast(text: str) -> list[PostRow]:
+    """
+    Raises `FallbackRequired` or `ParseError`
+    if the feed must be parsed with feedparser
+    """
+    return list(iter_fast(text))
+
+
+def iter_fast(text: str) -> Iterator[PostRow]:
+    if not text:
+        return
+    # DTDs can declare entities, let feedparser deal with them
+    if text.startswith("\ufeff") or "<!DOCTYPE" in text or "<!ENTITY" in text:
+        raise FallbackRequired("BOM or DTD in the document")
+    if (match := _XML_DECLARATION.match(text)) and match.group(1).lower() not in (
+        "utf-8",
+        "utf8",
+    ):
+        raise FallbackRequired(f"Unsupported encoding {match.group(1)}")
+
+    is_atom: bool | None = None
+    depth = 0
+    entry_depth: int | None = None
+    for event, elem in _iter_events(text):
+        if event == "start":
+            depth += 1
+            _check_base(elem)
+            if is_atom is None:
+                root = _tag_name(elem.tag)
+                if root not in ("rss", "feed"):
+                    raise FallbackRequired(f"Unsupported root element {elem.tag}")
+                is_atom = root == "feed"
+            elif entry_depth is None and _tag_name(elem.tag) in _ENTRY_TAGS:
+                entry_depth = depth
+        else:
+            if depth == entry_depth:
+                yield _parse_entry(elem, is_atom=bool(is_atom))
+                elem.clear()
+                entry_depth = None
+            depth -= 1
+
+
+def _iter_events(text: str) -> Iterator[tuple[str, Element]]:
+    parser: XMLPullParser = XMLPullParser(events=("start", "end"))
+    for start in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[start : start + CHUNK_SIZE])  # noqa: E203
+        yield from parser.read_events()  # type: ignore[misc]
+    parser.close()
+    yield from parser.read_events()  # type: ignore[misc]
+
+
+def _check_base(elem: Element) -> None:
+    for name in elem.attrib:
+        if name == f"{_XML_NAMESPACE}base" or name.lower() == "base":
+            raise FallbackRequired("Relative uris with xml:base")
+
+
+@lru_cache(maxsize=1024)
+def _tag_name(tag: str) -> str:
+    """Name of the element in terms of feedparser (lowercase, prefixed)"""
+    if not tag.startswith("{"):
+        return tag.lower()
+    namespace, local_name = tag[1:].split("}", 1)
+    namespace = namespace.lower()
+    local_name = local_name.lower()
+    if "backend.userland.com/rss" in namespace:
+        return local_name
+    prefix = _NAMESPACE_PREFIXES.get(namespace)
+    if prefix is None:
+        if local_name in _RELEVANT_LOCAL_NAMES:
+            # feedparser treats elements of unknown default namespace as plain ones,
+            #   but prefixes are lost here, so we can't tell them apart
+            raise FallbackRequired(f"Unknown namespace of {tag}")
+        return tag
+    return f"{prefix}:{local_name}" if prefix else local_name
+
+
+class _Entry:
+    def __init__(self, is_atom: bool):
+        self.is_atom = is_atom
+        self.title: str | None = None
+        self.title_value_depth: int | None = None
+        # depth of the last non-empty title, see feedparser's `_end_title`
+        self.title_depth = -1
+        self.id: str | None = None
+        self.link: str | None = None
+        self.comments: str | None = None
+        # term, scheme, label
+        self.tags: list[list[str | None]] = []
+
+    def to_row(self) -> PostRow:
+        if self.title is None:
+            raise FallbackRequired("Entry without title")
+        post_id = self.id or self.link
+        if post_id is None:
+            raise FallbackRequired("Entry without id and link")
+        # link, comments and terms can be None as with feedparser
+        return (  # type: ignore[return-value]
+            post_id,
+            self.title,
+            self.link,
+            self.comments,
+            tuple(term for term, _, _ in self.tags),  # type: ignore[misc]
+        )
+
+
+def _parse_entry(elem: Element, *, is_atom: bool) -> PostRow:
+    if _RDF_ABOUT in elem.attrib:
+        raise FallbackRequired("Entry with rdf:about")
+    entry = _Entry(is_atom)
+    for child in elem:
+        _walk(entry, child, depth=1, parent="", in_source=False)
+    return entry.to_row()
+
+
+def _walk(entry: _Entry, elem: Element, depth: int, parent: str, in_source: bool):
+    name = _tag_name(elem.tag)
+    if name in _TITLE_TAGS:
+        if depth > 1 and not in_source and not parent.startswith("media:"):
+            raise FallbackRequired(f"Nested {name}")
+        _handle_title(entry, elem, name, depth, store=not in_source)
+        return
+
+    # only titles of the source affect the entry
+    if in_source or name == "source":
+        if name == "source":
+            entry.title_depth = -1
+        for child in elem:
+            _walk(entry, child, depth + 1, parent=name, in_source=True)
+        return
+
+    if name in _UNSUPPORTED_TAGS or (depth > 1 and name in _HANDLED_TAGS):
+        raise FallbackRequired(f"Unsupported {name}")
+    if name in _HANDLED_TAGS:
+        _handle_field(entry, elem, name)
+    else:
+        for child in elem:
+            _walk(entry, child, depth + 1, parent=name, in_source=False)
+
+
+def _handle_field(entry: _Entry, elem: Element, name: str) -> None:
+    if name in _ID_TAGS:
+        _handle_id(entry, elem)
+    elif name == "link":
+        _handle_link(entry, elem)
+    elif name == "comments":
+        entry.comments = _text(elem, is_uri=True)
+    elif name in _CATEGORY_TAGS:
+        _handle_category(entry, elem, default_scheme=_CATEGORY_TAGS[name])
+    else:
+        raise FallbackRequired(f"Nested entry {name}")
+
+
+def _handle_title(
+    entry: _Entry, elem: Element, name: str, depth: int, store: bool
+) -> None:
+    attrs = _attrs(elem)
+    if "mode" in attrs or attrs.get("type", "text") not in (
+        "text",
+        "plain",
+        "text/plain",
+    ):
+        raise FallbackRequired("Title is not a plain text")
+    value = _text(elem)
+    # feedparser guesses whether rss title is html and sanitizes it
+    if not entry.is_atom and _LOOKS_LIKE_HTML.search(value):
+        raise FallbackRequired("Title looks like html")
+
+    if store and not -1 < entry.title_depth <= depth:
+        if entry.title_value_depth is None or depth <= entry.title_value_depth:
+            entry.title_value_depth = depth
+            entry.title = value
+    if value and name != "media:title":
+        entry.title_depth = depth
+
+
+def _handle_id(entry: _Entry, elem: Element) -> None:
+    is_link = _attrs(elem).get("ispermalink", "true") == "true"
+    value = _text(elem, is_uri=is_link)
+    entry.id = value
+    if is_link and entry.link is None:
+        entry.link = value
+
+
+def _handle_link(entry: _Entry, elem: Element) -> None:
+    attrs = _attrs(elem)
+    rel = attrs.get("rel", "alternate")
+    content_type = attrs.get(
+        "type", "application/atom+xml" if rel == "self" else "text/html"
+    )
+    if href := attrs.get("url", attrs.get("uri", attrs.get("href"))):
+        attrs["href"] = href
+    if "href" not in attrs:
+        value = _text(elem, is_uri=True).replace("&amp;", "&")
+        entry.link = _LINK_QUERY_FIXER.sub(r"&\g<1>", value)
+        return
+
+    if len(elem):
+        raise FallbackRequired("Link with child elements")
+    if rel == "alternate" and _map_content_type(content_type) in _HTML_TYPES:
+        entry.link = _resolve_uri(attrs["href"])
+
+
+def _handle_category(entry: _Entry, elem: Element, default_scheme: str | None) -> None:
+    attrs = _attrs(elem)
+    if default_scheme:
+        attrs.setdefault("scheme", default_scheme)
+    _add_tag(
+        entry.tags,
+        attrs.get("term"),
+        attrs.get("scheme", attrs.get("domain")),
+        attrs.get("label"),
+    )
+    value = _text(elem)
+    if not value:
+        return
+    if entry.tags and not entry.tags[-1][0]:
+        entry.tags[-1][0] = value
+    else:
+        _add_tag(entry.tags, value, None, None)
+
+
+def _add_tag(
+    tags: list[list[str | None]],
+    term: str | None,
+    scheme: str | None,
+    label: str | None,
+) -> None:
+    if not (term or scheme or label):
+        return
+    tag = [term, scheme, label]
+    if tag not in tags:
+        tags.append(tag)
+
+
+def _attrs(elem: Element) -> dict[str, str]:
+    attrs = {}
+    for name, value in elem.attrib.items():
+        if name.startswith("{"):
+            if name.startswith(_XML_NAMESPACE):
+                continue
+            raise FallbackRequired(f"Namespaced attribute {name}")
+        name = name.lower()
+        attrs[name] = value.lower() if name in ("rel", "type") else value
+    return attrs
+
+
+def _text(elem: Element, is_uri: bool = False) -> str:
+    if len(elem):
+        raise FallbackRequired(f"Child elements in {elem.tag}")
+    value = (elem.text or "").strip()
+    if is_uri and value:
+        value = _resolve_uri(value)
+    if value.isascii():
+        return value
+    # the same fixes of encoding as feedparser does
+    try:
+        value = value.encode("iso-8859-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    return value.translate(_CP1252)
+
+
+def _resolve_uri(uri: str) -> str:
+    # base uri is always empty here, so it's only a normalization
+    return _URI_FIXER.sub(r"\1\3", uri)
+
+
+def _map_content_type(content_type: str) -> str:
+    return {
+        "text": "text/plain",
+        "plain": "text/plain",
+        "html": "text/html",
+        "xhtml": "application/xhtml+xml",
+    }.get(content_type, content_type)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Callable, Iterator
+
+from prometheus_client import Histogram
+
+from feed_watchdog.domain.converters import compile_encoder
+from feed_watchdog.domain.events import ModifierData, SourceData
+from feed_watchdog.domain.models import Post
+from feed_watchdog.handlers import (
+    HandlerType,
+    get_handler_by_name,
+    get_lazy_parser_by_name,
+    register_dependent_cache,
+)
+from feed_watchdog.handlers.executor import is_process_pool, run_in_executor
+
+logger = logging.getLogger(__name__)
+
+stage_duration = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Duration of stream processing pipeline stages",
+    ["stage"],
+    namespace="feed_watchdog",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Pipeline:
+    """Handlers of the stream resolved with their options"""
+
+    key: str
+    fetcher: Callable
+    parser: Callable
+    modifiers: tuple[Callable, ...]
+    message_template: str
+    lazy_parser: Callable[[str], Iterator[Post]] | None = None
+    # fetcher accepts `cache_key` and can return `NOT_MODIFIED`
+    conditional_fetcher: bool = False
+
+    async def fetch(self, cache_key: str = "") -> Any:
+        """`cache_key` is passed only to fetchers that support it"""
+        kwargs = {"cache_key": cache_key} if self.conditional_fetcher else {}
+        with _timeit("fetch"):
+            return await self.fetcher(**kwargs)
+
+    async def parse(self, text: str) -> list[Post]:
+        with _timeit("parse"):
+            return await self.parser(text)
+
+    async def iter_parse(
+        self, text: str, batch_size: int
+    ) -> AsyncGenerator[list[Post], None]:
+        """
+        Yields parsed posts by batches in order of the feed. Parsing stops
+        when the consumer stops iteration, if the parser supports lazy parsing,
+        otherwise all posts are yielded in one batch. Parsing of each batch
+        is limited by the timeout of the parsers executor.
+        """
+        # state of the lazy parser can't be passed to another process
+        if self.lazy_parser is None or is_process_pool():
+            yield await self.parse(text)
+            return
+
+        posts = self.lazy_parser(text)
+        while True:
+            with _timeit("parse_batch"):
+                try:
+                    batch = await run_in_executor(_take, posts, batch_size)
+                except asyncio.TimeoutError:
+                    logger.exception("Timeout while parsing feed")
+                    return
+            if not batch:
+                return
+            yield batch
+
+    async def modify(self, posts: list[Post]) -> list[Post]:
+        with _timeit("modify"):
+            for modifier in self.modifiers:
+                posts = await modifier(posts)
+            return posts
+
+
+def _take(iterator: Iterator[Post], count: int) -> list[Post]:
+    return list(itertools.islice(iterator, count))
+
+
+@contextmanager
+def _timeit(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def pipeline_key(
+    source: SourceData, modifiers: list[ModifierData], message_template: str
+) -> str:
+    data = {
+        "source": compile_encoder(SourceData)(source),
+        "modifiers": [
+            compile_encoder(ModifierData)(modifier) for modifier in modifiers
+        ],
+        "message_template": message_template,
+    }
+    dumped = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.blake2b(dumped.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def compile_pipeline(
+    source: SourceData, modifiers: list[ModifierData], message_template: str
+) -> Pipeline:
+    fetcher = get_handler_by_name(
+        type=HandlerType.fetchers.value,
+        name=source.fetcher_type,
+        options=source.fetcher_options,
+    )
+    return Pipeline(
+        key=pipeline_key(source, modifiers, message_template),
+        fetcher=fetcher,
+        parser=get_handler_by_name(
+            type=HandlerType.parsers.value,
+            name=source.parser_type,
+            options=source.parser_options,
+        ),
+        modifiers=tuple(
+            get_handler_by_name(
+                type=HandlerType.modifiers.value,
+                name=modifier.type,
+                options=modifier.options,
+            )
+            for modifier in modifiers
+        ),
+        message_template=message_template,
+        lazy_parser=get_lazy_parser_by_name(
+            name=source.parser_type, options=source.parser_options
+        ),
+        conditional_fetcher=_accepts_argument(fetcher, "cache_key"),
+    )
+
+
+def _accepts_argument(func: Callable, name: str) -> bool:
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):  # e.g. some builtins
+        return False
+    return name in parameters or any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD
+        for parameter in parameters.values()
+    )
+
+
+class PipelinesCache:
+    """LRU cache of compiled pipelines"""
+
+    def __init__(self, maxsize: int = 1000):
+        self._maxsize = maxsize
+        self._pipelines: OrderedDict[str, Pipeline] = OrderedDict()
+        # compiled pipelines hold handlers of the current registry
+        register_dependent_cache(self)
+
+    def get(
+        self, source: SourceData, modifiers: list[ModifierData], message_template: str
+    ) -> Pipeline:
+        key = pipeline_key(source, modifiers, message_template)
+        if pipeline := self._pipelines.get(key):
+            self._pipelines.move_to_end(key)
+            return pipeline
+
+        pipeline = compile_pipeline(source, modifiers, message_template)
+        self._pipelines[key] = pipeline
+        if len(self._pipelines) > self._maxsize:
+            self._pipelines.popitem(last=False)
+        return pipeline
+
+    def clear(self) -> None:
+        self._pipelines.clear()
+
+    def __len__(self) -> int:
+        return len(self._pipelines)
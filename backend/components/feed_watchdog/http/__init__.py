@@ -1,6 +1,17 @@
-from feed_watchdog.http.core import domain_from_url, fetch_text_from_url
+from feed_watchdog.http.cache import ValidatorsCache
+from feed_watchdog.http.core import (
+    create_client,
+    domain_from_url,
+    fetch_from_url,
+    fetch_text_from_url,
+    init_client,
+)
 
 __all__ = [
+    "ValidatorsCache",
+    "create_client",
     "domain_from_url",
+    "fetch_from_url",
     "fetch_text_from_url",
+    "init_client",
 ]
@@ -0,0 +1,60 @@
+from typing import Mapping
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+
+def validators_from_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    return {
+        "etag": headers.get("etag", ""),
+        "last_modified": headers.get("last-modified", ""),
+    }
+
+
+class ValidatorsCache:
+    """Stores ETag and Last-Modified of responses for conditional requests"""
+
+    def __init__(self, redis_client: Redis, ttl: int = 7 * 24 * 60 * 60) -> None:
+        self._client = redis_client
+        self._ttl = ttl
+
+    async def get_headers(self, key: str, url: str) -> dict[str, str]:
+        validators = await self._client.hgetall(self._make_key(key, url))
+        headers = {}
+        if etag := validators.get("etag"):
+            headers["if-none-match"] = etag
+        if last_modified := validators.get("last_modified"):
+            headers["if-modified-since"] = last_modified
+        return headers
+
+    async def save(
+        self,
+        key: str,
+        url: str,
+        validators: Mapping[str, str],
+        pipe: Pipeline | None = None,
+    ) -> None:
+        """Pass `pipe` to save validators in its transaction (executed by caller)"""
+        if pipe is not None:
+            self._queue_save(pipe, key, url, validators)
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            self._queue_save(pipe, key, url, validators)
+            await pipe.execute()
+
+    def _queue_save(
+        self,
+        pipe: Pipeline,
+        key: str,
+        url: str,
+        validators: Mapping[str, str],
+    ) -> None:
+        cache_key = self._make_key(key, url)
+        pipe.delete(cache_key)
+        if validators := {name: value for name, value in validators.items() if value}:
+            pipe.hset(cache_key, mapping=validators)
+            pipe.expire(cache_key, self._ttl)
+
+    @staticmethod
+    def _make_key(key: str, url: str) -> str:
+        return f"http:validators:{key}:{url}"
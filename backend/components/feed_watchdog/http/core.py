@@ -1,11 +1,14 @@
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from functools import lru_cache
-from typing import Optional
+from typing import AsyncGenerator, Literal, Optional
 
 import httpx
 from tldextract import tldextract
 
+from feed_watchdog.domain.models import NOT_MODIFIED, FetchedText, FetchResult
+from feed_watchdog.http.cache import ValidatorsCache, validators_from_headers
 from feed_watchdog.sentry.error_tracking import write_warn_message
 
 logger = logging.getLogger(__name__)
@@ -16,22 +19,122 @@ DEFAULT_UA = (
 )
 
 
+class _HostSemaphore:
+    def __init__(self, value: int) -> None:
+        self.semaphore = asyncio.Semaphore(value)
+        self.users = 0
+
+
+_client: httpx.AsyncClient | None = None
+_max_connections_per_host: int | None = None
+# semaphores of hosts that have requests in flight or waiting
+_host_semaphores: dict[str, _HostSemaphore] = {}
+_validators_cache: ValidatorsCache | None = None
+
+
+def create_client(
+    *,
+    timeout: float = 30.0,
+    max_connections: int | None = 100,
+    max_keepalive_connections: int | None = 20,
+    http2: bool = False,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+    )
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        verify=False,  # noqa: S501
+        timeout=timeout,
+        limits=limits,
+        http2=http2,
+    )
+
+
+def init_client(
+    client: httpx.AsyncClient,
+    max_connections_per_host: int | None = None,
+    validators_cache: ValidatorsCache | None = None,
+) -> None:
+    global _client, _max_connections_per_host, _validators_cache
+    _client = client
+    _max_connections_per_host = max_connections_per_host
+    _validators_cache = validators_cache
+    _host_semaphores.clear()
+
+
+@asynccontextmanager
+async def _get_client() -> AsyncGenerator[httpx.AsyncClient, None]:
+    if _client is not None:
+        yield _client
+        return
+
+    async with create_client() as client:
+        yield client
+
+
+@asynccontextmanager
+async def _host_limit(url: str) -> AsyncGenerator[None, None]:
+    # httpx has only global limits, so limit connections per host by ourselves
+    if not _max_connections_per_host:
+        yield
+        return
+
+    host = httpx.URL(url).host
+    if host not in _host_semaphores:
+        _host_semaphores[host] = _HostSemaphore(_max_connections_per_host)
+    host_semaphore = _host_semaphores[host]
+    host_semaphore.users += 1
+    try:
+        async with host_semaphore.semaphore:
+            yield
+    finally:
+        host_semaphore.users -= 1
+        # don't keep semaphores of all hosts ever fetched
+        if not host_semaphore.users and _host_semaphores.get(host) is host_semaphore:
+            del _host_semaphores[host]
+
+
 @lru_cache(maxsize=None)
 def domain_from_url(url: str):
     _, td, tsu = tldextract.extract(url)
     return f"{td}.{tsu}"
 
 
-async def fetch_text_from_url(url: str, *, encoding="", retry=0) -> Optional[str]:
-    # TODO don't fetch if content is not changed
-    async with httpx.AsyncClient(
-        follow_redirects=True, verify=False, timeout=30  # noqa: S501
-    ) as client:
+async def fetch_text_from_url(
+    url: str, *, encoding="", retry=0, cache_key: str = ""
+) -> Optional[str] | Literal[FetchResult.NOT_MODIFIED]:
+    result = await fetch_from_url(
+        url, encoding=encoding, retry=retry, cache_key=cache_key
+    )
+    if isinstance(result, FetchedText):
+        return result.text
+    return result
+
+
+async def fetch_from_url(
+    url: str, *, encoding="", retry=0, cache_key: str = ""
+) -> Optional[FetchedText] | Literal[FetchResult.NOT_MODIFIED]:
+    """
+    If `cache_key` is passed and validators cache is initialized, then
+    conditional request is made and `NOT_MODIFIED` is returned
+    if content is not changed since the last fetch with the same key.
+    Validators of the response are returned with the text and must be saved
+    by the caller (see `ValidatorsCache.save`) after the text is processed.
+    """
+    cache = _validators_cache if cache_key else None
+    headers = {"user-agent": DEFAULT_UA}
+    if cache is not None:
+        headers.update(await cache.get_headers(cache_key, url))
+
+    async with _get_client() as client:
         while True:
             try:
-                res = await client.get(
-                    url, headers={"user-agent": DEFAULT_UA}, timeout=30.0
-                )
+                async with _host_limit(url):
+                    res = await client.get(url, headers=headers)
+                if res.status_code == httpx.codes.NOT_MODIFIED:
+                    return NOT_MODIFIED
                 res.raise_for_status()
             except httpx.HTTPError as e:
                 if retry > 0:
@@ -50,5 +153,8 @@ async def fetch_text_from_url(url: str, *, encoding="", retry=0) -> Optional[str
 
             if encoding:
                 res.encoding = encoding
-
-            return res.text
+            return FetchedText(
+                text=res.text,
+                url=url,
+                validators=validators_from_headers(res.headers),
+            )
@@ -0,0 +1,141 @@
+"""
+Codecs of pub/sub messages.
+
+Messages are written in one of two formats:
+
+- "fields" - every field of the message is encoded as json separately.
+  All codecs write plain json, so name of the codec is not stored
+  (`CODEC_FIELD` is only skipped while decoding messages of older versions).
+- "envelope" - whole message is encoded into one `PAYLOAD_FIELD`
+  with the header "<version>:<codec>:<compression>:". Compressed body is
+  base64-encoded, because pub/sub redis client decodes responses to str.
+"""
+import base64
+import binascii
+import dataclasses
+import json
+import math
+import zlib
+from typing import Any, Callable, Mapping
+
+from redis.typing import EncodableT, FieldT
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+CODEC_FIELD = "__codec__"
+PAYLOAD_FIELD = "payload"
+DEFAULT_CODEC_NAME = "json"
+ENVELOPE_VERSION = "1"
+COMPRESSION_LEVEL = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class Codec:
+    name: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes | str], Any]
+
+
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def _encode_orjson(value: Any) -> bytes:
+    try:
+        data = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # e.g. integers bigger than 64 bit
+        return _encode_json(value)
+    # orjson writes NaN and Infinity as null, stdlib json keeps them
+    if b"null" in data and _has_non_finite_float(value):
+        return _encode_json(value)
+    return data
+
+
+def _has_non_finite_float(value: Any) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite_float(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite_float(item) for item in value)
+    return False
+
+
+def _decode_orjson(data: bytes | str) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # e.g. NaN or Infinity that stdlib json writes by default
+        return json.loads(data)
+
+
+stdlib_json_codec = Codec(name="json", encode=_encode_json, decode=json.loads)
+# output of orjson is plain json, so it's the same codec for consumers
+orjson_codec = (
+    Codec(name="json", encode=_encode_orjson, decode=_decode_orjson)
+    if orjson is not None
+    else None
+)
+
+_codecs: dict[str, Codec] = {"json": orjson_codec or stdlib_json_codec}
+
+
+def get_codec(name: str = DEFAULT_CODEC_NAME) -> Codec:
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise ValueError(f"Unknown or not installed pub/sub codec: {name}") from None
+
+
+def encode_message(data: dict[str, Any], codec: Codec) -> dict[FieldT, EncodableT]:
+    return {key: codec.encode(value) for key, value in data.items()}
+
+
+def encode_envelope(
+    data: dict[str, Any], codec: Codec, compress_threshold: int = 0
+) -> dict[FieldT, EncodableT]:
+    """Set `compress_threshold` to compress body bigger than it (in bytes)"""
+    body = codec.encode(data)
+    compression = ""
+    if compress_threshold and len(body) > compress_threshold:
+        body = base64.b64encode(zlib.compress(body, COMPRESSION_LEVEL))
+        compression = "zlib"
+    header = f"{ENVELOPE_VERSION}:{codec.name}:{compression}:".encode()
+    return {PAYLOAD_FIELD: header + body}
+
+
+def decode_envelope(payload: bytes | str) -> dict[str, Any]:
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    try:
+        version, codec_name, compression, body = payload.split(":", 3)
+    except ValueError:
+        raise ValueError("Invalid envelope of pub/sub message") from None
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version: {version}")
+    codec = get_codec(codec_name)
+    if not compression:
+        return codec.decode(body)
+    if compression != "zlib":
+        raise ValueError(f"Unsupported envelope compression: {compression}")
+    try:
+        return codec.decode(zlib.decompress(base64.b64decode(body, validate=True)))
+    except (binascii.Error, zlib.error) as e:
+        raise ValueError(f"Invalid compressed envelope: {e}") from None
+
+
+def decode_message(message_data: Mapping[str, bytes | str]) -> dict[str, Any]:
+    """Decode message of any format"""
+    if PAYLOAD_FIELD in message_data and len(message_data) == 1:
+        return decode_envelope(message_data[PAYLOAD_FIELD])
+    codec_name = message_data.get(CODEC_FIELD)
+    codec = get_codec(json.loads(codec_name) if codec_name else DEFAULT_CODEC_NAME)
+    return {
+        key: codec.decode(value)
+        for key, value in message_data.items()
+        if key != CODEC_FIELD
+    }
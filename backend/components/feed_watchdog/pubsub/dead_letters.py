@@ -0,0 +1,116 @@
+"""
+Dead letters - messages that failed too many times. They are moved from
+the topic to the "<topic>:dead" stream as is (in the original format),
+with the error attached, and can be replayed to the topic after the fix.
+
+A replayed message is published to the topic again, so it is delivered to
+every consumer group of the topic. That's why replay is refused when the
+topic has groups other than the one that failed the message (otherwise
+the other groups would process it twice), and for dead letters whose
+message had been trimmed from the topic before it was moved.
+"""
+import dataclasses
+import json
+import logging
+from typing import Any
+
+from redis import asyncio as aioredis
+
+from feed_watchdog.pubsub.codecs import decode_message
+
+logger = logging.getLogger(__name__)
+
+
+def dead_letters_topic(topic_name: str) -> str:
+    return f"{topic_name}:dead"
+
+
+@dataclasses.dataclass
+class DeadLetter:
+    id: str
+    message_id: str
+    group: str
+    deliveries: int
+    error: str
+    fields: dict[str, str]
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return decode_message(self.fields)
+
+
+async def move_to_dead_letters(
+    redis_client: aioredis.Redis,
+    *,
+    topic_name: str,
+    group_id: str,
+    msg_id: str,
+    deliveries: int,
+    error: str,
+) -> None:
+    """Copy message to the dead letters stream and acknowledge it"""
+    entries = await redis_client.xrange(topic_name, min=msg_id, max=msg_id)
+    fields = entries[0][1] if entries else {}
+    async with redis_client.pipeline(transaction=True) as pipe:
+        await pipe.xadd(
+            dead_letters_topic(topic_name),
+            {
+                "message_id": msg_id,
+                "group": group_id,
+                "deliveries": deliveries,
+                "error": error,
+                "fields": json.dumps(fields),
+            },
+        )
+        await pipe.xack(topic_name, group_id, msg_id)
+        await pipe.execute()
+    logger.warning(
+        "Message %s of %s is moved to dead letters after %s deliveries: %s",
+        msg_id,
+        topic_name,
+        deliveries,
+        error,
+    )
+
+
+async def list_dead_letters(
+    redis_client: aioredis.Redis, topic_name: str, count: int | None = None
+) -> list[DeadLetter]:
+    entries = await redis_client.xrange(dead_letters_topic(topic_name), count=count)
+    return [
+        DeadLetter(
+            id=entry_id,
+            message_id=fields["message_id"],
+            group=fields["group"],
+            deliveries=int(fields["deliveries"]),
+            error=fields["error"],
+            fields=json.loads(fields["fields"]),
+        )
+        for entry_id, fields in entries
+    ]
+
+
+async def replay_dead_letter(
+    redis_client: aioredis.Redis, topic_name: str, dead_letter: DeadLetter
+) -> str:
+    """
+    Publish message to the topic again (it gets new id and is delivered
+    to all consumer groups of the topic) and delete the dead letter.
+    Raise ValueError if the message can't be replayed
+    """
+    if not dead_letter.fields:
+        raise ValueError(
+            f"Message {dead_letter.message_id} was trimmed from {topic_name}"
+            " before it was moved to dead letters, nothing to replay"
+        )
+    groups = {group["name"] for group in await redis_client.xinfo_groups(topic_name)}
+    if groups - {dead_letter.group}:
+        raise ValueError(
+            f"{topic_name} has consumer groups other than {dead_letter.group},"
+            " they would get the replayed message again"
+        )
+    async with redis_client.pipeline(transaction=True) as pipe:
+        await pipe.xadd(topic_name, dead_letter.fields)  # type: ignore[arg-type]
+        await pipe.xdel(dead_letters_topic(topic_name), dead_letter.id)
+        new_id, _ = await pipe.execute()
+    return new_id
@@ -1,18 +1,63 @@
-import json
+import copy
+import itertools
 import logging
-from typing import Any
+from typing import Any, Iterable, Literal
 
 from redis import asyncio as aioredis
+from redis.typing import EncodableT, FieldT
+
+from feed_watchdog.pubsub.codecs import (
+    Codec,
+    encode_envelope,
+    encode_message,
+    get_codec,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class Publisher:
-    def __init__(self, redis_client: aioredis.Redis) -> None:
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        codec: Codec | None = None,
+        message_format: Literal["fields", "envelope"] = "fields",
+        compress_threshold: int = 0,
+    ) -> None:
         self._redis_client = redis_client
+        self._codec = codec or get_codec()
+        self._message_format = message_format
+        self._compress_threshold = compress_threshold
+
+    def with_client(self, redis_client: aioredis.Redis) -> "Publisher":
+        """Make copy of publisher that uses another client (e.g. pipeline)"""
+        publisher = copy.copy(self)
+        publisher._redis_client = redis_client  # noqa: SLF001
+        return publisher
 
     async def publish(self, channel, data: dict[str, Any]) -> None:
-        encoded_data = {
-            key: json.dumps(value).encode("utf-8") for key, value in data.items()
-        }
-        await self._redis_client.xadd(channel, encoded_data)
+        await self._redis_client.xadd(channel, self._encode(data))
+
+    async def publish_many(
+        self, channel, events: Iterable[dict[str, Any]], chunk_size: int = 500
+    ) -> int:
+        """
+        Publish messages with pipelined XADDs, one round trip per `chunk_size`
+        messages. Returns number of published messages.
+        """
+        published = 0
+        events = iter(events)
+        while chunk := list(itertools.islice(events, chunk_size)):
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                for data in chunk:
+                    await pipe.xadd(channel, self._encode(data))
+                await pipe.execute()
+            published += len(chunk)
+        return published
+
+    def _encode(self, data: dict[str, Any]) -> dict[FieldT, EncodableT]:
+        if self._message_format == "envelope":
+            return encode_envelope(
+                data, self._codec, compress_threshold=self._compress_threshold
+            )
+        return encode_message(data, self._codec)
@@ -1,15 +1,29 @@
-import json
+import asyncio
 import logging
-from typing import Any, AsyncGenerator, Literal
+import os
+import socket
+import sys
+from math import ceil
+from typing import Any, AsyncGenerator, Callable, Literal, Sequence
 
 from picodi import Provide, inject
 from redis import asyncio as aioredis
 
+from feed_watchdog.pubsub.codecs import decode_message
+from feed_watchdog.pubsub.dead_letters import move_to_dead_letters
 from feed_watchdog.workers.dependencies import get_pub_sub_redis_client
 
 logger = logging.getLogger(__name__)
 
 
+def make_consumer_id(template: str) -> str:
+    """
+    Id of the consumer, "{hostname}" is replaced with the host name
+    and "{pid}" with the process id
+    """
+    return template.format(hostname=socket.gethostname(), pid=os.getpid())
+
+
 class Subscriber:
     @inject
     def __init__(
@@ -21,7 +35,10 @@ class Subscriber:
         consumer_id: str,
         messages_per_read: int | None = 1000,
         autoclaim_min_idle_time: int = 60 * 1000,  # ms
-        check_backlog_every: int = 100,
+        read_block_timeout: int = 5000,  # ms
+        check_backlog_interval: float = 10,  # seconds, 0 - disabled
+        dead_consumer_idle_time: int = 0,  # ms, 0 - don't delete consumers
+        max_deliveries: int = 0,  # 0 - don't move messages to dead letters
     ):
         self._redis_client = redis_client
         self._topic_name = topic_name
@@ -29,50 +46,281 @@ class Subscriber:
         self._consumer_id = consumer_id
         self._messages_per_read = messages_per_read
         self._autoclaim_min_idle_time = autoclaim_min_idle_time
-        self._check_backlog_every = check_backlog_every
+        self._read_block_timeout = read_block_timeout
+        self._check_backlog_interval = check_backlog_interval
+        self._dead_consumer_idle_time = dead_consumer_idle_time
+        self._max_deliveries = max_deliveries
         self._is_initialized = False
 
     async def __aiter__(self) -> AsyncGenerator[tuple[str, dict], None]:
-        iterations = self._check_backlog_every
-        while True:
-            async for msg_id, msg_data in self.read(message_id="latest"):
+        async for batch in self.iter_batches():
+            for msg_id, msg_data in batch:
                 yield msg_id, msg_data
-            iterations = max(0, iterations - 1)
 
-            if self._check_backlog_every and iterations == 0:
-                logger.info("Checking backlog")
-                async for msg_id, msg_data in self.autoclaim():
-                    logger.info("Found message in backlog: %s", msg_id)
-                    yield msg_id, msg_data
-                iterations = self._check_backlog_every
+    async def iter_batches(
+        self,
+        max_size: int | None = None,
+        max_wait: float = 0,
+        capacity: Callable[[], int] | None = None,
+    ) -> AsyncGenerator[list[tuple[str, dict]], None]:
+        """
+        Yield lists of up to `max_size` messages (`messages_per_read` by default).
+        Batch is yielded when it's full or when `max_wait` seconds have passed
+        since its first message was read.
+
+        `capacity` returns how many messages the consumer can take now,
+        new messages are read and claimed only up to it (at least one).
+        """
+        max_size = max_size or self._messages_per_read or sys.maxsize
+
+        def batch_size() -> int:
+            if capacity is None:
+                return max_size
+            return max(min(max_size, capacity()), 1)
+
+        loop = asyncio.get_running_loop()
+        next_backlog_check = loop.time() + self._check_backlog_interval
+        # messages that were not acknowledged before restart
+        batch = [message async for message in self.read_pending()]
+        deadline = loop.time()
+        while True:
+            if batch and (len(batch) >= batch_size() or loop.time() >= deadline):
+                # messages pending after restart can be more than max_size
+                for i in range(0, len(batch), max_size):
+                    yield batch[i : i + max_size]  # noqa: E203
+                batch = []
+
+            # wake up only to yield the batch or to check the backlog
+            wake_up_at = loop.time() + self._read_block_timeout / 1000
+            if batch:
+                wake_up_at = min(wake_up_at, deadline)
+            if self._check_backlog_interval:
+                wake_up_at = min(wake_up_at, next_backlog_check)
+            messages = [
+                message
+                async for message in self.read(
+                    message_id="latest",
+                    count=batch_size() - len(batch),
+                    block=max(ceil((wake_up_at - loop.time()) * 1000), 1),
+                )
+            ]
+
+            free = batch_size() - len(batch) - len(messages)
+            if (
+                self._check_backlog_interval
+                and loop.time() >= next_backlog_check
+                # otherwise the backlog is checked after the next read
+                and free > 0
+            ):
+                backlog = self._check_backlog(count=free)
+                messages.extend(
+                    await self._drop_exhausted([message async for message in backlog])
+                )
+                next_backlog_check = loop.time() + self._check_backlog_interval
+
+            if messages and not batch:
+                deadline = loop.time() + max_wait
+            batch.extend(messages)
 
     async def read(
-        self, message_id: str | Literal["latest", "earliest"] = "latest"
+        self,
+        message_id: str | Literal["latest", "earliest"] = "latest",
+        count: int | None = None,
+        block: int | None = None,
     ) -> AsyncGenerator[tuple[str, dict], None]:
         await self._init_group_and_stream()
         response = await self._redis_client.xreadgroup(
             groupname=self._group_id,
             consumername=self._consumer_id,
             streams={self._topic_name: self._parse_message_id(message_id)},
-            count=self._messages_per_read,
-            block=100,
+            count=count or self._messages_per_read,
+            # history of pending messages is returned without blocking
+            block=(
+                (block or self._read_block_timeout) if message_id == "latest" else None
+            ),
         )
         for _stream_name, stream_data in response:
             for msg_id, msg_data in stream_data:
                 yield msg_id, self._decode_message_data(msg_data)
 
-    async def autoclaim(self) -> AsyncGenerator[tuple[str, dict], None]:
+    async def read_pending(self) -> AsyncGenerator[tuple[str, dict], None]:
+        """Messages that were delivered to this consumer but not acknowledged"""
+        last_id = "0"
+        while messages := [message async for message in self.read(message_id=last_id)]:
+            for msg_id, msg_data in messages:
+                logger.info("Found pending message: %s", msg_id)
+                yield msg_id, msg_data
+            last_id = messages[-1][0]
+
+    async def _check_backlog(
+        self, count: int | None = None
+    ) -> AsyncGenerator[tuple[str, dict], None]:
+        logger.info("Checking backlog")
+        claimed = 0
+        if self._dead_consumer_idle_time:
+            async for msg_id, msg_data in self.reap_dead_consumers(count=count):
+                claimed += 1
+                yield msg_id, msg_data
+        if count is not None:
+            if claimed >= count:
+                # the rest is claimed by the next check
+                return
+            count -= claimed
+        async for msg_id, msg_data in self.autoclaim(count=count):
+            logger.info("Found message in backlog: %s", msg_id)
+            yield msg_id, msg_data
+
+    async def reap_dead_consumers(
+        self, count: int | None = None
+    ) -> AsyncGenerator[tuple[str, dict], None]:
+        """
+        Claim up to `count` (all by default) pending messages of consumers
+        that are idle longer than `dead_consumer_idle_time` and delete these
+        consumers from the group once they have no pending messages
+        """
+        await self._init_group_and_stream()
+        consumers = await self._redis_client.xinfo_consumers(  # type: ignore[no-untyped-call] # noqa: E501
+            self._topic_name, self._group_id
+        )
+        for consumer in consumers:
+            name = consumer["name"]
+            if (
+                name == self._consumer_id
+                or consumer["idle"] < self._dead_consumer_idle_time
+            ):
+                continue
+            if count is not None and count <= 0:
+                return
+            async for msg_id, msg_data in self._claim_pending_of(name, count):
+                logger.info("Claimed message %s of dead consumer %s", msg_id, name)
+                if count is not None:
+                    count -= 1
+                yield msg_id, msg_data
+            if not await self._pending_of(name):
+                # consumer is deleted only without pending messages,
+                #   otherwise they would be lost
+                logger.info("Deleting dead consumer %s", name)
+                await self._redis_client.xgroup_delconsumer(
+                    self._topic_name, self._group_id, name
+                )
+
+    async def _claim_pending_of(
+        self, consumer: str, count: int | None = None
+    ) -> AsyncGenerator[tuple[str, dict], None]:
+        while pending_ids := await self._pending_of(consumer, count):
+            claimed = await self._redis_client.xclaim(
+                self._topic_name,
+                self._group_id,
+                self._consumer_id,
+                min_idle_time=0,
+                message_ids=list(pending_ids),
+            )
+            for msg_id, msg_data in claimed:
+                # deleted messages are returned without data by old redis
+                if msg_data:
+                    yield msg_id, self._decode_message_data(msg_data)
+            if count is not None:
+                count -= len(pending_ids)
+                if count <= 0:
+                    return
+            if pending_ids == await self._pending_of(consumer, count):
+                return
+
+    async def _pending_of(self, consumer: str, count: int | None = None) -> list[str]:
+        page_size = self._messages_per_read or 1000
+        pending = await self._redis_client.xpending_range(
+            self._topic_name,
+            self._group_id,
+            min="-",
+            max="+",
+            count=min(count, page_size) if count is not None else page_size,
+            consumername=consumer,
+        )
+        return [message["message_id"] for message in pending]
+
+    async def autoclaim(
+        self, count: int | None = None
+    ) -> AsyncGenerator[tuple[str, dict], None]:
         response = await self._redis_client.xautoclaim(
             name=self._topic_name,
             groupname=self._group_id,
             consumername=self._consumer_id,
             min_idle_time=self._autoclaim_min_idle_time,
-            count=self._messages_per_read,
+            count=count or self._messages_per_read,
         )
         for stream_data in response[1]:
             msg_id, msg_data = stream_data
             yield msg_id, self._decode_message_data(msg_data)
 
+    async def fail(self, msg_id: str, error: str) -> bool:
+        """
+        Message is processed at most `max_deliveries` times: after the last
+        failed attempt it's moved to the dead letters, otherwise it stays
+        pending and is retried from the backlog.
+        Returns True if message was moved.
+        """
+        if not self._max_deliveries:
+            return False
+        # the failed delivery is already counted
+        deliveries = (await self._delivery_counts([msg_id])).get(msg_id, 0)
+        if not self._is_exhausted(attempts=deliveries):
+            return False
+        await self._move_to_dead_letters(msg_id, deliveries, error)
+        return True
+
+    async def _drop_exhausted(
+        self, messages: list[tuple[str, dict]]
+    ) -> list[tuple[str, dict]]:
+        """
+        Move claimed messages that were already processed `max_deliveries`
+        times to the dead letters. These messages were never failed
+        explicitly, e.g. they crash or hang the consumer.
+        """
+        if not self._max_deliveries or not messages:
+            return messages
+        counts = await self._delivery_counts([msg_id for msg_id, _ in messages])
+        result = []
+        for msg_id, msg_data in messages:
+            deliveries = counts.get(msg_id, 0)
+            # the claim is counted as a delivery, but it's not processed yet
+            if self._is_exhausted(attempts=deliveries - 1):
+                await self._move_to_dead_letters(
+                    msg_id,
+                    deliveries,
+                    f"Not acknowledged after {self._max_deliveries} deliveries",
+                )
+            else:
+                result.append((msg_id, msg_data))
+        return result
+
+    def _is_exhausted(self, attempts: int) -> bool:
+        return attempts >= self._max_deliveries
+
+    async def _delivery_counts(self, msg_ids: Sequence[str]) -> dict[str, int]:
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for msg_id in msg_ids:
+                await pipe.xpending_range(
+                    self._topic_name, self._group_id, min=msg_id, max=msg_id, count=1
+                )
+            responses = await pipe.execute()
+        return {
+            message["message_id"]: message["times_delivered"]
+            for response in responses
+            for message in response
+        }
+
+    async def _move_to_dead_letters(
+        self, msg_id: str, deliveries: int, error: str
+    ) -> None:
+        await move_to_dead_letters(
+            self._redis_client,
+            topic_name=self._topic_name,
+            group_id=self._group_id,
+            msg_id=msg_id,
+            deliveries=deliveries,
+            error=error,
+        )
+
     def _parse_message_id(self, message_id: str):
         if message_id == "latest":
             message_id = ">"
@@ -81,10 +329,7 @@ class Subscriber:
         return message_id
 
     def _decode_message_data(self, message_data: dict[str, bytes]) -> dict[str, Any]:
-        decoded_data = {}
-        for key, value in message_data.items():
-            decoded_data[key] = json.loads(value)
-        return decoded_data
+        return decode_message(message_data)
 
     async def _init_group_and_stream(self) -> None:
         if self._is_initialized:
@@ -117,8 +362,33 @@ class Subscriber:
         self._is_initialized = True
 
     async def commit(self, msg_id: str) -> None:
-        await self._redis_client.xack(  # type: ignore[no-untyped-call]
+        await self.commit_many([msg_id])
+
+    async def commit_many(self, msg_ids: Sequence[str]) -> int:
+        """
+        Returns number of acknowledged messages. Messages that were already
+        acknowledged (e.g. by another consumer that claimed them) are not counted.
+        """
+        if not msg_ids:
+            return 0
+        return await self._redis_client.xack(  # type: ignore[no-untyped-call]
+            self._topic_name,
+            self._group_id,
+            *msg_ids,
+        )
+
+    async def touch(self, msg_ids: Sequence[str]) -> None:
+        """
+        Reset idle time of messages that are still waiting for processing,
+        so other consumers don't claim them from the backlog
+        """
+        if not msg_ids:
+            return
+        await self._redis_client.xclaim(
             self._topic_name,
             self._group_id,
-            msg_id,
+            self._consumer_id,
+            min_idle_time=0,
+            message_ids=list(msg_ids),
+            justid=True,
         )
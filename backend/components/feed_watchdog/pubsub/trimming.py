@@ -0,0 +1,105 @@
+"""
+Trimming of old messages of topics.
+
+Plain `XADD MAXLEN` trims messages regardless of consumer groups, so
+the trimming boundary is calculated here: messages older than `max_age`
+or beyond `max_len` are trimmed, but never those that are pending or
+not yet delivered in any group of the topic. Topics without groups are not
+trimmed at all (consumers can be not started yet). Trimming is approximate
+(`XTRIM MINID ~`): redis removes only whole nodes of the stream, so
+some older messages can stay until the next trimming.
+"""
+import dataclasses
+import logging
+import time
+
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class StreamStats:
+    length: int
+    memory: int | None  # bytes, None if not supported by server
+
+
+async def safe_trim(
+    redis_client: aioredis.Redis,
+    topic_name: str,
+    *,
+    max_len: int = 0,  # 0 - unlimited
+    max_age: int = 0,  # seconds, 0 - unlimited
+) -> int:
+    """
+    Returns number of trimmed messages. Position of `max_len` boundary
+    is estimated from the times of the first and last messages.
+    """
+    if (not max_len and not max_age) or not await redis_client.exists(topic_name):
+        return 0
+    info = await redis_client.xinfo_stream(topic_name)
+    boundaries = []
+    if max_age:
+        boundaries.append((int((time.time() - max_age) * 1000), 0))
+    if max_len and info["length"] > max_len:
+        boundaries.append(_estimate_id(info, info["length"] - max_len))
+    if not boundaries:
+        return 0
+    protected_id = await _first_protected_id(redis_client, topic_name)
+    if protected_id is None:
+        # no groups, nobody has read the messages yet
+        return 0
+    min_id = min(max(boundaries), protected_id)
+    trimmed = await redis_client.xtrim(
+        topic_name, minid=_format_id(min_id), approximate=True
+    )
+    if trimmed:
+        logger.info("Trimmed %s messages of %s", trimmed, topic_name)
+    return trimmed
+
+
+async def stream_stats(redis_client: aioredis.Redis, topic_name: str) -> StreamStats:
+    length = await redis_client.xlen(topic_name)
+    try:
+        memory = await redis_client.memory_usage(topic_name)
+    except ResponseError:
+        memory = None
+    return StreamStats(length=length, memory=memory)
+
+
+async def _first_protected_id(
+    redis_client: aioredis.Redis, topic_name: str
+) -> tuple[int, int] | None:
+    """
+    Id of the oldest message that is pending or not delivered in any group,
+    None if the topic has no groups
+    """
+    result = None
+    for group in await redis_client.xinfo_groups(topic_name):
+        # messages after the last delivered are not read by the group yet
+        protected_id = _next_id(_parse_id(group["last-delivered-id"]))
+        if group["pending"]:
+            pending = await redis_client.xpending(topic_name, group["name"])
+            protected_id = min(protected_id, _parse_id(pending["min"]))
+        result = protected_id if result is None else min(result, protected_id)
+    return result
+
+
+def _estimate_id(info: dict, position: int) -> tuple[int, int]:
+    first_time, _ = _parse_id(info["first-entry"][0])
+    last_time, _ = _parse_id(info["last-entry"][0])
+    return first_time + (last_time - first_time) * position // info["length"], 0
+
+
+def _parse_id(msg_id: str) -> tuple[int, int]:
+    timestamp, _, sequence = msg_id.partition("-")
+    return int(timestamp), int(sequence or 0)
+
+
+def _next_id(msg_id: tuple[int, int]) -> tuple[int, int]:
+    return msg_id[0], msg_id[1] + 1
+
+
+def _format_id(msg_id: tuple[int, int]) -> str:
+    return f"{msg_id[0]}-{msg_id[1]}"
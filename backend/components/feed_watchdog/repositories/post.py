@@ -1,3 +1,8 @@
+import copy
+import hashlib
+import time
+from typing import AsyncGenerator, Iterable
+
 from redis.asyncio import Redis
 
 from feed_watchdog.domain.interfaces import IPostRepository
@@ -7,6 +12,12 @@ class RedisPostRepository(IPostRepository):
     def __init__(self, client: Redis):
         self._client = client
 
+    def with_client(self, client: Redis) -> "RedisPostRepository":
+        """Make copy of repository that uses another client (e.g. pipeline)"""
+        repository = copy.copy(self)
+        repository._client = client  # noqa: SLF001
+        return repository
+
     async def mark_post_as_seen(self, stream_id: str, *post_id: str) -> None:
         await self._client.sadd(self._make_marked_post_key(stream_id), *post_id)
 
@@ -18,10 +29,36 @@ class RedisPostRepository(IPostRepository):
             self._make_marked_post_key(stream_id), post_id
         )
 
+    async def filter_unseen(self, stream_id: str, post_ids: Iterable[str]) -> set[str]:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        seen_flags = await self._client.smismember(
+            self._make_marked_post_key(stream_id), post_ids
+        )
+        return {
+            post_id for post_id, is_seen in zip(post_ids, seen_flags) if not is_seen
+        }
+
+    async def iter_streams_with_seen_posts(self) -> AsyncGenerator[str, None]:
+        pattern = self._make_marked_post_key("*")
+        async for key in self._client.scan_iter(match=pattern):
+            yield key.removeprefix(pattern[:-1])
+
     @staticmethod
     def _make_marked_post_key(stream_id: str) -> str:
         return f"posts:marked:seen:{stream_id}"
 
+    async def get_content_digest(self, stream_id: str) -> str | None:
+        return await self._client.hget(self._make_content_digests_key(), stream_id)
+
+    async def save_content_digest(self, stream_id: str, digest: str) -> None:
+        await self._client.hset(self._make_content_digests_key(), stream_id, digest)
+
+    @staticmethod
+    def _make_content_digests_key() -> str:
+        return "posts:content:digests"
+
     async def sent_posts_count(self, stream_id: str, receiver_type: str) -> int:
         return await self._client.scard(
             self._make_sent_posts_key(stream_id, receiver_type)
@@ -44,3 +81,251 @@ class RedisPostRepository(IPostRepository):
     @staticmethod
     def _make_sent_posts_key(stream_id: str, receiver_type: str) -> str:
         return f"sent_posts:{stream_id}_{receiver_type}"
+
+
+class RedisSortedSetPostRepository(RedisPostRepository):
+    """
+    Keeps seen posts in sorted set with the time post was last seen in the feed.
+    Posts that are not seen for `max_age` seconds or exceed `max_posts` per stream
+    are trimmed on write. Posts marked in the same call are never trimmed
+    by `max_posts`, so it should be well above the number of posts in the feed,
+    otherwise posts that are still in the feed can be trimmed by later calls
+    and sent again.
+    """
+
+    # KEYS[1] - sorted set of seen posts
+    # ARGV[1] - current timestamp, ARGV[2] - max age (0 - unlimited),
+    #   ARGV[3] - max posts (0 - unlimited), ARGV[4...] - post ids
+    MARK_AND_TRIM_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local max_age = tonumber(ARGV[2])
+        local max_posts = tonumber(ARGV[3])
+        for i = 4, #ARGV do
+            redis.call("ZADD", KEYS[1], now, ARGV[i])
+        end
+        if max_age > 0 then
+            redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", "(" .. (now - max_age))
+        end
+        if max_posts > 0 then
+            -- posts marked just now are in the feed, keep all of them
+            local keep = math.max(max_posts, #ARGV - 3)
+            redis.call("ZREMRANGEBYRANK", KEYS[1], 0, -keep - 1)
+        end
+    """
+
+    def __init__(self, client: Redis, max_age: int = 0, max_posts: int = 0):
+        super().__init__(client)
+        self._max_age = max_age
+        self._max_posts = max_posts
+        self._mark_and_trim = client.register_script(self.MARK_AND_TRIM_SCRIPT)
+
+    async def mark_post_as_seen(self, stream_id: str, *post_id: str) -> None:
+        await self._mark_and_trim(
+            keys=[self._make_marked_post_key(stream_id)],
+            args=[int(time.time()), self._max_age, self._max_posts, *post_id],
+            client=self._client,
+        )
+
+    async def seen_posts_count(self, stream_id: str) -> int:
+        return await self._client.zcard(self._make_marked_post_key(stream_id))
+
+    async def is_post_seen(self, post_id: str, stream_id: str) -> bool:
+        score = await self._client.zscore(
+            self._make_marked_post_key(stream_id), post_id
+        )
+        return score is not None
+
+    async def filter_unseen(self, stream_id: str, post_ids: Iterable[str]) -> set[str]:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        scores = await self._client.zmscore(
+            self._make_marked_post_key(stream_id), post_ids
+        )
+        return {post_id for post_id, score in zip(post_ids, scores) if score is None}
+
+    @staticmethod
+    def _make_marked_post_key(stream_id: str) -> str:
+        return f"posts:marked:seen_at:{stream_id}"
+
+    async def migrate_from_set(
+        self, stream_id: str, delete_source: bool = False, batch_size: int = 1000
+    ) -> int:
+        """Copy posts from the set of `RedisPostRepository`, returns copied count"""
+        source_key = RedisPostRepository._make_marked_post_key(stream_id)
+        target_key = self._make_marked_post_key(stream_id)
+        now = int(time.time())
+        copied = 0
+        cursor = 0
+        while True:
+            cursor, post_ids = await self._client.sscan(
+                source_key, cursor=cursor, count=batch_size
+            )
+            if post_ids:
+                copied += await self._client.zadd(
+                    target_key, {post_id: now for post_id in post_ids}, nx=True
+                )
+            if not cursor:
+                break
+
+        if delete_source:
+            await self._client.delete(source_key)
+        return copied
+
+
+class RedisBloomPostRepository(RedisPostRepository):
+    """
+    Keeps seen posts in scalable bloom filter stored in redis bitmaps.
+    Memory usage doesn't depend on the length of post ids, but some unseen posts
+    can be treated as seen with probability of `error_rate`.
+    Filter grows by adding layers with twice bigger capacity and tighter
+    error rate, so total error rate stays below `error_rate`.
+    """
+
+    # KEYS[1] - hash with filter metadata, layers are stored in `KEYS[1]:{n}`
+    #   (keys of layers are not declared in KEYS, so these scripts are not
+    #   compatible with redis cluster and ACL key patterns)
+    # scripts are prefixed with `_BLOOM_SCRIPT_HEADER` when registered
+    # ARGV[1] - capacity of the first layer, ARGV[2] - error rate
+    #   (both are used only for new filters), ARGV[3...] - pairs of post id hashes
+    _BLOOM_SCRIPT_HEADER = """
+        local meta = KEYS[1]
+        local capacity = tonumber(redis.call("HGET", meta, "capacity") or ARGV[1])
+        local error_rate = tonumber(
+            redis.call("HGET", meta, "error_rate") or ARGV[2]
+        )
+        local layers = tonumber(redis.call("HGET", meta, "layers") or 0)
+
+        local function layer_params(n)
+            local layer_capacity = capacity * 2 ^ n
+            local layer_error_rate = error_rate * 0.5 ^ (n + 1)
+            local bits = math.ceil(
+                -layer_capacity * math.log(layer_error_rate) / math.log(2) ^ 2
+            )
+            local hashes = math.ceil(bits / layer_capacity * math.log(2))
+            return layer_capacity, bits, hashes
+        end
+
+        local function layer_contains(n, h1, h2)
+            local _, bits, hashes = layer_params(n)
+            for i = 0, hashes - 1 do
+                local offset = math.floor((h1 + i * h2) % bits)
+                if redis.call("GETBIT", meta .. ":" .. n, offset) == 0 then
+                    return false
+                end
+            end
+            return true
+        end
+
+        local function contains(h1, h2)
+            for n = layers - 1, 0, -1 do
+                if layer_contains(n, h1, h2) then
+                    return true
+                end
+            end
+            return false
+        end
+    """
+
+    MARK_SCRIPT = """
+        local last_layer_count = tonumber(
+            redis.call("HGET", meta, "last_layer_count") or 0
+        )
+        local added = 0
+        for i = 3, #ARGV, 2 do
+            local h1, h2 = tonumber(ARGV[i]), tonumber(ARGV[i + 1])
+            if not contains(h1, h2) then
+                if layers == 0 or last_layer_count >= layer_params(layers - 1) then
+                    layers = layers + 1
+                    last_layer_count = 0
+                end
+                local n = layers - 1
+                local _, bits, hashes = layer_params(n)
+                for j = 0, hashes - 1 do
+                    local offset = math.floor((h1 + j * h2) % bits)
+                    redis.call("SETBIT", meta .. ":" .. n, offset, 1)
+                end
+                last_layer_count = last_layer_count + 1
+                added = added + 1
+            end
+        end
+        if added > 0 then
+            redis.call(
+                "HSET", meta,
+                "capacity", capacity,
+                "error_rate", error_rate,
+                "layers", layers,
+                "last_layer_count", last_layer_count
+            )
+            redis.call("HINCRBY", meta, "count", added)
+        end
+        return added
+    """
+
+    CHECK_SCRIPT = """
+        local result = {}
+        for i = 3, #ARGV, 2 do
+            if contains(tonumber(ARGV[i]), tonumber(ARGV[i + 1])) then
+                table.insert(result, 1)
+            else
+                table.insert(result, 0)
+            end
+        end
+        return result
+    """
+
+    def __init__(self, client: Redis, capacity: int = 10000, error_rate: float = 0.001):
+        super().__init__(client)
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._mark = client.register_script(
+            self._BLOOM_SCRIPT_HEADER + self.MARK_SCRIPT
+        )
+        self._check = client.register_script(
+            self._BLOOM_SCRIPT_HEADER + self.CHECK_SCRIPT
+        )
+
+    async def mark_post_as_seen(self, stream_id: str, *post_id: str) -> None:
+        await self._mark(
+            keys=[self._make_marked_post_key(stream_id)],
+            args=self._make_script_args(post_id),
+            client=self._client,
+        )
+
+    async def seen_posts_count(self, stream_id: str) -> int:
+        """Approximate count, posts that are false positives are not counted"""
+        count = await self._client.hget(self._make_marked_post_key(stream_id), "count")
+        return int(count or 0)
+
+    async def is_post_seen(self, post_id: str, stream_id: str) -> bool:
+        return not await self.filter_unseen(stream_id, [post_id])
+
+    async def filter_unseen(self, stream_id: str, post_ids: Iterable[str]) -> set[str]:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        seen_flags = await self._check(
+            keys=[self._make_marked_post_key(stream_id)],
+            args=self._make_script_args(post_ids),
+            client=self._client,
+        )
+        return {
+            post_id for post_id, is_seen in zip(post_ids, seen_flags) if not is_seen
+        }
+
+    def _make_script_args(self, post_ids: Iterable[str]) -> list[str | int | float]:
+        args: list[str | int | float] = [self._capacity, self._error_rate]
+        for post_id in post_ids:
+            args.extend(_bloom_hashes(post_id))
+        return args
+
+    @staticmethod
+    def _make_marked_post_key(stream_id: str) -> str:
+        return f"posts:marked:bloom:{stream_id}"
+
+
+def _bloom_hashes(post_id: str) -> tuple[int, int]:
+    # two 32-bit hashes for double hashing (lua numbers are doubles,
+    #   so offsets must fit into 53 bits); second hash must be odd
+    digest = hashlib.blake2b(post_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest[:4], "big"), int.from_bytes(digest[4:], "big") | 1
@@ -1,6 +1,7 @@
-from .core import make_hash_tags, template_to_text
+from .core import join_tags, make_hash_tags, template_to_text
 
 __all__ = [
+    "join_tags",
     "make_hash_tags",
     "template_to_text",
 ]
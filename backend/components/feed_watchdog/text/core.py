@@ -1,5 +1,6 @@
 import re
 import string
+from functools import lru_cache
 from typing import Iterable
 
 only_letters_and_underscore = re.compile(r"[^a-zA-Zа-яА-Я0-9_ёЁіІїЇґҐєЄ]")
@@ -15,6 +16,15 @@ def make_hash_tags(tags: Iterable[str]) -> list[str]:
     return hash_tags
 
 
+@lru_cache(maxsize=1024)
+def join_tags(tags: tuple[str, ...]) -> tuple[str, str]:
+    """
+    Tags and hash tags joined for templates.
+    Cached because source tags are the same for all posts of the stream.
+    """
+    return "; ".join(tags), " ".join(make_hash_tags(tags))
+
+
 def template_to_text(template_string: str, **kwargs) -> str:
     template = string.Template(template_string)
     return template.safe_substitute(kwargs)
@@ -0,0 +1,42 @@
+"""
+Compare throughput of compiled event converters with dacite decoding
+and `dataclasses.asdict` encoding (as it was before).
+
+Usage:
+    python -m development.benchmarks.events_converters --messages 10
+"""
+import argparse
+import dataclasses
+import sys
+import timeit
+
+import dacite
+
+from feed_watchdog.domain.events import MessageBatch
+
+MESSAGE = {"post_id": "1", "text": "Title https://example.com/1"}
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--number", type=int, default=10000)
+    args = parser.parse_args(argv[1:])
+
+    event = MessageBatch.from_dict(
+        {"stream_slug": "slug", "messages": [MESSAGE] * args.messages}
+    )
+    data = event.as_dict()
+    funcs = {
+        "decode": lambda: MessageBatch.from_dict(data),
+        "decode (dacite)": lambda: dacite.from_dict(data_class=MessageBatch, data=data),
+        "encode": event.as_dict,
+        "encode (asdict)": lambda: dataclasses.asdict(event),
+    }
+    for name, func in funcs.items():
+        elapsed = timeit.timeit(func, number=args.number)
+        print(f"{name:>16}: {args.number / elapsed:.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,86 @@
+"""
+Measure cost of handler lookup with cached registry and with all handlers
+rebuilt on every lookup (as it was before registry caching: modules are
+loaded and every class handler is instantiated on each lookup).
+
+Usage:
+    python -m development.benchmarks.handlers_lookup --handlers-conf handlers.yaml
+"""
+import argparse
+import sys
+import timeit
+from functools import partial
+from typing import Any, Optional
+
+from feed_watchdog.handlers import (
+    HANDLERS,
+    Handler,
+    HandlerType,
+    get_handler_by_name,
+    init_handlers_config,
+    load_handlers,
+)
+
+
+def lookup() -> None:
+    get_handler_by_name(type=HandlerType.parsers.value, name="rss", options={})
+
+
+def lookup_with_rebuild() -> None:
+    rebuild_get_handler_by_name(type=HandlerType.parsers.value, name="rss", options={})
+
+
+def rebuild_get_registered_handlers() -> dict[str, dict[str, Handler]]:
+    # copy of `get_registered_handlers` before registry caching
+    load_handlers()
+
+    result = {}
+    for handler_type, handlers in HANDLERS.items():
+        result[handler_type] = {
+            name: Handler(
+                name_,
+                obj if kwargs is None else obj(**kwargs),
+                options_class,
+                return_fields_schema,
+                return_model,
+            )
+            for name, (
+                name_,
+                obj,
+                kwargs,
+                options_class,
+                return_fields_schema,
+                return_model,
+            ) in handlers.items()
+        }
+    return result
+
+
+def rebuild_get_handler_by_name(
+    type: str, name: str, options: Optional[dict] = None
+) -> Any:
+    # copy of `get_handler_by_name` before registry caching
+    registered_handlers = rebuild_get_registered_handlers()
+    handler = dict(registered_handlers[type])[name]
+    options_ = None
+    if options and handler.options_class:
+        options_ = handler.options_class(**options)
+    return partial(handler.obj, options=options_)
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--handlers-conf", default=None)
+    parser.add_argument("--number", type=int, default=10000)
+    args = parser.parse_args(argv[1:])
+    if args.handlers_conf:
+        init_handlers_config(args.handlers_conf)
+
+    lookup()  # import handlers modules before measuring
+    for name, func in [("rebuild", lookup_with_rebuild), ("cached", lookup)]:
+        elapsed = timeit.timeit(func, number=args.number)
+        print(f"{name:>8}: {elapsed / args.number * 1_000_000:.2f} us per lookup")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
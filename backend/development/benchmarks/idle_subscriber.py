@@ -0,0 +1,78 @@
+"""
+Measure CPU time and redis commands of the subscriber waiting
+on an empty stream: with 100 ms reads (as it was before) and with
+long blocking reads.
+
+Usage:
+    python -m development.benchmarks.idle_subscriber \\
+        --redis-url redis://localhost/15 --seconds 30
+
+Benchmark creates and deletes its own stream in the given database.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from contextlib import aclosing
+
+from redis import asyncio as aioredis
+
+from feed_watchdog.pubsub.subscriber import Subscriber
+
+TOPIC = "benchmark:idle_subscriber"
+
+
+async def measure(
+    client: aioredis.Redis, seconds: float, read_block_timeout: int
+) -> tuple[float, int]:
+    commands = 0
+    execute_command = client.execute_command
+
+    async def counting_execute_command(*args, **kwargs):
+        nonlocal commands
+        commands += 1
+        return await execute_command(*args, **kwargs)
+
+    client.execute_command = counting_execute_command  # type: ignore[method-assign]
+    subscriber = Subscriber(
+        redis_client=client,
+        topic_name=TOPIC,
+        group_id="benchmark",
+        consumer_id="benchmark",
+        read_block_timeout=read_block_timeout,
+    )
+    start = time.process_time()
+    try:
+        async with aclosing(subscriber.iter_batches()) as batches:
+            await asyncio.wait_for(anext(batches), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        client.execute_command = execute_command  # type: ignore[method-assign]
+    return time.process_time() - start, commands
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = aioredis.from_url(args.redis_url, decode_responses=True)
+    try:
+        for name, read_block_timeout in [("100 ms", 100), ("blocking", 5000)]:
+            cpu_time, commands = await measure(client, args.seconds, read_block_timeout)
+            print(
+                f"{name:>8}: cpu {cpu_time / args.seconds * 1000:.2f} ms/s,"
+                f" {commands / args.seconds:.2f} commands/s"
+            )
+            await client.delete(TOPIC)
+    finally:
+        await client.aclose()  # type: ignore[attr-defined]
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args(argv[1:])
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,78 @@
+"""
+Compare memory used by parsed posts: slotted `Post` of rss parser
+and the same dataclass with instance `__dict__` and own list
+of source tags (as it was before).
+
+Usage:
+    python -m development.benchmarks.posts_memory --entries 1000
+"""
+import argparse
+import dataclasses
+import sys
+import tracemalloc
+from typing import Callable
+
+from development.mock_feed_server import XML_BODY, XML_ENTRY
+from feed_watchdog.handlers.parsers.rss import Post, PostRow, parse_feed, post_from_row
+
+DictPost = dataclasses.make_dataclass(
+    "DictPost", [(field.name, field.type) for field in dataclasses.fields(Post)]
+)
+
+
+def make_feed(entries: int) -> str:
+    return XML_BODY.strip().format(
+        entries="".join(
+            XML_ENTRY.strip().format(
+                id=f"entry-{i}",
+                link=f"https://github.com/yakimka/feed_watchdog/?num={i}",
+                title=f"Title of entry #{i}",
+                content=f"Content of entry #{i}",
+            )
+            for i in range(entries)
+        )
+    )
+
+
+def allocated_memory(func: Callable[[], list]) -> int:
+    """Size of memory blocks allocated by `func` and still alive"""
+    tracemalloc.start()
+    try:
+        result = func()  # noqa: F841
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def make_posts_before(rows: list[PostRow]) -> list:
+    return [
+        DictPost(
+            post_id=post_id,
+            title=title,
+            url=url,
+            comments_url=comments_url,
+            post_tags=post_tags,
+            source_tags=[],
+        )
+        for post_id, title, url, comments_url, post_tags in rows
+    ]
+
+
+def make_posts(rows: list[PostRow]) -> list[Post]:
+    return [post_from_row(row) for row in rows]
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1000)
+    args = parser.parse_args(argv[1:])
+
+    rows = parse_feed(make_feed(args.entries))
+    print(f"posts: {len(rows)}")
+    for name, func in [("before", make_posts_before), ("after", make_posts)]:
+        memory = allocated_memory(lambda: func(rows))
+        print(f"{name:>6}: {memory / len(rows):.0f} bytes per post")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
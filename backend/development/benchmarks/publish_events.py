@@ -0,0 +1,80 @@
+"""
+Measure time of publishing events of one schedule tick: one XADD round
+trip per event (as it was before) and pipelined chunks of `publish_many`.
+
+Usage:
+    python -m development.benchmarks.publish_events \\
+        --redis-url redis://localhost/15 --events 10000 --chunk-size 500
+
+Benchmark creates and deletes its own stream in the given database.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from redis import asyncio as aioredis
+
+from feed_watchdog.domain.events import ProcessStreamEvent, SourceData
+from feed_watchdog.pubsub.publisher import Publisher
+
+TOPIC = "benchmark:publish_events"
+
+
+def make_events(count: int) -> list[dict]:
+    return [
+        ProcessStreamEvent(
+            slug=f"stream-{i}",
+            source=SourceData(
+                fetcher_type="text",
+                fetcher_options={"url": f"https://example.com/{i}/rss"},
+                parser_type="rss",
+                parser_options={},
+                tags=["tag"],
+            ),
+            modifiers=[],
+            message_template="$title $url",
+            squash=True,
+        ).as_dict()
+        for i in range(count)
+    ]
+
+
+async def publish_one_by_one(publisher: Publisher, events: list[dict]) -> None:
+    for event in events:
+        await publisher.publish(TOPIC, event)
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = aioredis.from_url(args.redis_url, decode_responses=True)
+    publisher = Publisher(client)
+    events = make_events(args.events)
+    runs = [
+        ("one by one", lambda: publish_one_by_one(publisher, events)),
+        (
+            "publish_many",
+            lambda: publisher.publish_many(TOPIC, events, chunk_size=args.chunk_size),
+        ),
+    ]
+    try:
+        for name, func in runs:
+            start = time.perf_counter()
+            await func()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12}: {elapsed * 1000:.0f} ms")
+            await client.delete(TOPIC)
+    finally:
+        await client.aclose()  # type: ignore[attr-defined]
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args(argv[1:])
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,97 @@
+"""
+Compare peak memory and time of reddit_json decoding:
+plain `json.loads` of the whole listing (as it was before) and codecs
+of the parser (orjson is measured only if installed).
+
+Usage:
+    python -m development.benchmarks.reddit_json_parsing --posts 100
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+
+from feed_watchdog.handlers.parsers import reddit_json
+
+
+def random_string(length: int) -> str:
+    return "".join(random.choices(string.ascii_letters, k=length))
+
+
+def make_listing(posts: int) -> str:
+    """Listing with `limit=100`-like posts with embedded media metadata"""
+
+    def image() -> dict:
+        return {
+            "status": "valid",
+            "e": "Image",
+            "m": "image/jpg",
+            "p": [
+                {"y": 60, "x": 108, "u": f"https://preview.redd.it/{random_string(40)}"}
+                for _ in range(6)
+            ],
+            "s": {"y": 1080, "x": 1920, "u": f"https://i.redd.it/{random_string(30)}"},
+            "id": random_string(8),
+        }
+
+    children = [
+        {
+            "kind": "t3",
+            "data": {
+                "id": f"id{i}",
+                "title": f"Post {i} {random_string(40)}",
+                "url": f"https://example.com/{i}",
+                "permalink": f"/r/Python/comments/id{i}/post/",
+                "score": random.randrange(10000),
+                "selftext": random_string(2000),
+                "num_comments": random.randrange(500),
+                "media_metadata": {random_string(8): image() for _ in range(20)},
+                "link_flair_richtext": [{"e": "text", "t": "Discussion"}],
+                "all_awardings": [],
+            },
+        }
+        for i in range(posts)
+    ]
+    return json.dumps({"kind": "Listing", "data": {"children": children}})
+
+
+def decode_json(text: str) -> list:
+    return reddit_json._rows(json.loads(text))  # noqa: SLF001
+
+
+def peak_memory(func: Callable[[str], list], text: str) -> int:
+    tracemalloc.start()
+    try:
+        func(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv[1:])
+
+    text = make_listing(args.posts)
+    print(f"listing size: {len(text) / 1024 / 1024:.2f} MiB")
+    decoders = {
+        "json": decode_json,
+        **reddit_json._decoders,  # noqa: SLF001
+    }
+    for name, func in decoders.items():
+        elapsed = timeit.timeit(lambda: func(text), number=args.number)
+        memory = peak_memory(func, text)
+        print(
+            f"{name:>8}: {elapsed / args.number * 1000:.1f} ms,"
+            f" peak memory {memory / 1024 / 1024:.2f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,77 @@
+"""
+Compare redis memory used by seen posts storages.
+
+Usage:
+    python -m development.benchmarks.seen_posts_memory --redis-url redis://localhost/15
+
+Benchmark writes to the given database and flushes it at the end,
+so don't run it against database with real data.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from redis import asyncio as aioredis
+
+from feed_watchdog.repositories.post import (
+    RedisBloomPostRepository,
+    RedisPostRepository,
+)
+
+STREAM_ID = "benchmark"
+
+
+async def fill(
+    repository: RedisPostRepository, post_ids: list[str], batch_size: int
+) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(post_ids), batch_size):
+        batch = post_ids[i : i + batch_size]  # noqa: E203
+        await repository.mark_post_as_seen(STREAM_ID, *batch)
+    return time.perf_counter() - start
+
+
+async def memory_usage(client: aioredis.Redis, pattern: str) -> int:
+    total = 0
+    async for key in client.scan_iter(match=pattern):
+        total += await client.memory_usage(key, samples=0) or 0
+    return total
+
+
+async def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--bloom-capacity", type=int, default=10000)
+    parser.add_argument("--bloom-error-rate", type=float, default=0.001)
+    args = parser.parse_args(argv[1:])
+
+    client = aioredis.from_url(args.redis_url, decode_responses=True)
+    post_ids = [f"https://example.com/posts/{uuid.uuid4()}" for _ in range(args.posts)]
+    repositories = {
+        "set": RedisPostRepository(client),
+        "bloom": RedisBloomPostRepository(
+            client, capacity=args.bloom_capacity, error_rate=args.bloom_error_rate
+        ),
+    }
+    try:
+        for name, repository in repositories.items():
+            elapsed = await fill(repository, post_ids, args.batch_size)
+            key = repository._make_marked_post_key(STREAM_ID)  # noqa: SLF001
+            used = await memory_usage(client, f"{key}*")
+            per_million = used / args.posts * 1_000_000
+            print(
+                f"{name:>6}: {used / 1024 / 1024:.2f} MiB for {args.posts} posts"
+                f" ({per_million / 1024 / 1024:.2f} MiB per million),"
+                f" {elapsed:.2f}s to write"
+            )
+    finally:
+        await client.flushdb()
+        await client.aclose()  # type: ignore[attr-defined]
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv))
@@ -0,0 +1,396 @@
+import asyncio
+import dataclasses
+from contextlib import suppress
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from redis import asyncio as aioredis
+
+from feed_watchdog.domain.events import ProcessStreamEvent, SourceData
+from feed_watchdog.handlers.parsers.rss import Post
+from feed_watchdog.handlers.pipeline import Pipeline
+from feed_watchdog.http import ValidatorsCache, core, fetch_from_url, init_client
+from feed_watchdog.pubsub.codecs import decode_message
+from feed_watchdog.pubsub.publisher import Publisher
+from feed_watchdog.repositories.post import (
+    RedisBloomPostRepository,
+    RedisPostRepository,
+)
+from feed_watchdog.workers.settings import AppSettings, PubSubSettings, Settings
+from feed_watchdog.workers.workers.fetch_posts_from_streams import (
+    ProcessStreamsByScheduleWorker,
+)
+
+STREAMS_TOPIC = "streams"
+MESSAGES_TOPIC = "messages"
+GROUP = "fetch_posts_from_streams"
+
+
+@pytest.fixture()
+def settings() -> Settings:
+    return Settings(
+        app=AppSettings(
+            api_token="token",
+            streams_topic=STREAMS_TOPIC,
+            messages_topic=MESSAGES_TOPIC,
+            fetch_concurrency=2,
+        ),
+        pubsub=PubSubSettings(read_block_timeout=100, heartbeat_interval=0),
+    )
+
+
+@dataclasses.dataclass
+class FakePipeline:
+    text: str = "feed"
+    posts: list[Post] = dataclasses.field(default_factory=list)
+
+    async def fetch(self, **kwargs):  # noqa: U100
+        return self.text
+
+    async def parse(self, text):  # noqa: U100
+        return list(self.posts)
+
+    async def iter_parse(self, text, batch_size):  # noqa: U100
+        for i in range(0, len(self.posts), batch_size):
+            yield self.posts[i : i + batch_size]  # noqa: E203
+
+    async def modify(self, posts):
+        return posts
+
+
+def make_post(post_id: str) -> Post:
+    return Post(
+        post_id=post_id,
+        title=f"Title of {post_id}",
+        url=f"https://example.com/{post_id}",
+        comments_url="",
+        post_tags=(),
+        source_tags=(),
+    )
+
+
+@pytest.fixture()
+def pipeline() -> FakePipeline:
+    return FakePipeline(posts=[make_post("post-2"), make_post("post-1")])
+
+
+@pytest.fixture()
+def make_worker(settings, redis_pubsub_server, pipeline):
+    def maker(storage_redis=redis_pubsub_server) -> ProcessStreamsByScheduleWorker:
+        worker = ProcessStreamsByScheduleWorker(
+            settings=settings,
+            post_repository=RedisPostRepository(client=storage_redis),
+            bloom_post_repository=RedisBloomPostRepository(client=storage_redis),
+            publisher=Publisher(redis_pubsub_server),
+            redis=redis_pubsub_server,
+            storage_redis=storage_redis,
+            validators_cache=ValidatorsCache(redis_client=storage_redis),
+        )
+        worker._pipelines = Mock(get=Mock(return_value=pipeline))  # noqa: SLF001
+        return worker
+
+    return maker
+
+
+@pytest.fixture()
+async def other_redis(redis_pubsub_server_url) -> aioredis.Redis:
+    redis = aioredis.from_url(
+        redis_pubsub_server_url.rsplit("/", 1)[0] + "/3", decode_responses=True
+    )
+    yield redis
+    await redis.flushdb()
+    await redis.aclose()  # type: ignore[attr-defined]
+
+
+def make_event(slug: str) -> ProcessStreamEvent:
+    return ProcessStreamEvent(
+        slug=slug,
+        message_template="$title",
+        squash=False,
+        modifiers=[],
+        source=SourceData(
+            fetcher_type="fetch_text",
+            fetcher_options={"url": f"https://example.com/{slug}"},
+            parser_type="rss",
+            parser_options={},
+            tags=[],
+        ),
+    )
+
+
+async def publish_events(redis_client, count: int) -> None:
+    publisher = Publisher(redis_client)
+    for i in range(count):
+        await publisher.publish(STREAMS_TOPIC, make_event(f"stream-{i}").as_dict())
+
+
+async def run_until(worker, done: asyncio.Event) -> None:
+    task = asyncio.create_task(worker.process_streams())
+    try:
+        await asyncio.wait_for(done.wait(), timeout=5)
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+async def run_slow_processing(worker, count: int) -> dict[str, int]:
+    """Run worker with slow processing of events until `count` are processed"""
+    stats = {"processed": 0, "running": 0, "max_running": 0, "max_held": 0}
+    done = asyncio.Event()
+
+    async def process_event(event):
+        stats["running"] += 1
+        stats["max_running"] = max(stats["max_running"], stats["running"])
+        held = len(worker._held_ids)  # noqa: SLF001
+        stats["max_held"] = max(stats["max_held"], held)
+        # streams finish at different times
+        await asyncio.sleep(0.02 * (int(event.slug[-1]) % 3 + 1))
+        stats["running"] -= 1
+        stats["processed"] += 1
+        if stats["processed"] == count:
+            done.set()
+
+    worker.process_event = process_event
+    await run_until(worker, done)
+    return stats
+
+
+async def test_streams_are_processed_concurrently(make_worker, redis_pubsub_server):
+    await publish_events(redis_pubsub_server, 6)
+
+    stats = await run_slow_processing(make_worker(), 6)
+
+    pending = await redis_pubsub_server.xpending(STREAMS_TOPIC, GROUP)
+    assert stats["max_running"] == 2
+    # processed messages are acknowledged
+    assert pending["pending"] == 0
+
+
+async def test_processed_messages_are_acknowledged_in_bulk(
+    make_worker, redis_pubsub_server, monkeypatch
+):
+    await publish_events(redis_pubsub_server, 6)
+    worker = make_worker()
+    commits = []
+    commit_many = worker._subscriber.commit_many  # noqa: SLF001
+
+    async def spy_commit_many(msg_ids):
+        commits.append(list(msg_ids))
+        await asyncio.sleep(0.05)
+        return await commit_many(msg_ids)
+
+    monkeypatch.setattr(
+        worker._subscriber, "commit_many", spy_commit_many
+    )  # noqa: SLF001
+
+    await run_slow_processing(worker, 6)
+
+    assert sum(len(msg_ids) for msg_ids in commits) == 6
+    assert len(commits) < 6
+
+
+async def test_consumer_holds_up_to_fetch_concurrency_messages(
+    make_worker, redis_pubsub_server
+):
+    await publish_events(redis_pubsub_server, 6)
+
+    stats = await run_slow_processing(make_worker(), 6)
+
+    assert stats["max_held"] == 2
+
+
+async def test_held_messages_are_not_idle(settings, make_worker, redis_pubsub_server):
+    settings.pubsub.heartbeat_interval = 0.05
+    await publish_events(redis_pubsub_server, 1)
+    worker = make_worker()
+    idle_times = []
+    done = asyncio.Event()
+
+    async def process_event(event):  # noqa: U100
+        await asyncio.sleep(0.3)
+        pending = await redis_pubsub_server.xpending_range(
+            STREAMS_TOPIC, GROUP, min="-", max="+", count=1
+        )
+        idle_times.append(pending[0]["time_since_delivered"])
+        done.set()
+
+    worker.process_event = process_event
+
+    await run_until(worker, done)
+
+    assert idle_times[0] < 200
+
+
+async def sent_post_ids(redis_client) -> list[str]:
+    messages = await redis_client.xrange(MESSAGES_TOPIC)
+    return [
+        message["post_id"]
+        for _, data in messages
+        for message in decode_message(data)["messages"]
+    ]
+
+
+async def test_messages_and_seen_posts_are_written_in_one_transaction(
+    make_worker, redis_pubsub_server, monkeypatch
+):
+    worker = make_worker()
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-1")
+
+    async def fail(*args, **kwargs):  # noqa: U100
+        raise RuntimeError("Can't save digest")
+
+    monkeypatch.setattr(RedisPostRepository, "save_content_digest", fail)
+    with pytest.raises(RuntimeError):
+        await worker.process_event(make_event("stream-0"))
+    monkeypatch.undo()
+
+    assert await sent_post_ids(redis_pubsub_server) == []
+    assert await repository.filter_unseen("stream-0", ["post-2"]) == {"post-2"}
+
+    await worker.process_event(make_event("stream-0"))
+
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2"]
+    assert await repository.filter_unseen("stream-0", ["post-2"]) == set()
+    assert await repository.get_content_digest("stream-0")
+
+
+async def test_seen_posts_are_written_to_storage_of_other_database(
+    make_worker, redis_pubsub_server, other_redis
+):
+    worker = make_worker(storage_redis=other_redis)
+    storage_repository = RedisPostRepository(client=other_redis)
+    await storage_repository.mark_post_as_seen("stream-0", "post-1")
+
+    await worker.process_event(make_event("stream-0"))
+
+    pubsub_repository = RedisPostRepository(client=redis_pubsub_server)
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2"]
+    assert await storage_repository.filter_unseen("stream-0", ["post-2"]) == set()
+    assert await storage_repository.get_content_digest("stream-0")
+    assert await pubsub_repository.seen_posts_count("stream-0") == 0
+    assert await pubsub_repository.get_content_digest("stream-0") is None
+
+
+@pytest.fixture()
+async def feed_requests(monkeypatch) -> list[httpx.Request]:
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="feed", headers={"etag": '"v1"'})
+
+    monkeypatch.setattr(core, "_client", None)
+    monkeypatch.setattr(core, "_validators_cache", None)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        yield requests, client
+
+
+async def test_validators_are_saved_only_after_processing(
+    make_worker, pipeline, redis_pubsub_server, feed_requests, monkeypatch
+):
+    requests, client = feed_requests
+    init_client(client, validators_cache=ValidatorsCache(redis_pubsub_server))
+
+    async def fetch(cache_key):
+        return await fetch_from_url("https://example.com/rss", cache_key=cache_key)
+
+    async def fail(posts):  # noqa: U100
+        raise RuntimeError("Can't modify posts")
+
+    monkeypatch.setattr(pipeline, "fetch", fetch)
+    monkeypatch.setattr(pipeline, "modify", fail)
+    worker = make_worker()
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-1")
+    with pytest.raises(RuntimeError):
+        await worker.process_event(make_event("stream-0"))
+    monkeypatch.setattr(pipeline, "modify", FakePipeline().modify)
+
+    await worker.process_event(make_event("stream-0"))
+    await worker.process_event(make_event("stream-0"))
+
+    # retry after the failure fetches the full content
+    assert "if-none-match" not in requests[1].headers
+    assert requests[2].headers["if-none-match"] == '"v1"'
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2"]
+
+
+async def test_unchanged_content_is_not_processed_again(
+    make_worker, pipeline, redis_pubsub_server, monkeypatch
+):
+    worker = make_worker()
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-1")
+    await worker.process_event(make_event("stream-0"))
+    parse = Mock(wraps=pipeline.parse)
+    monkeypatch.setattr(pipeline, "parse", parse)
+    # new post would be sent if the content was parsed
+    pipeline.posts.insert(0, make_post("post-3"))
+
+    await worker.process_event(make_event("stream-0"))
+
+    parse.assert_not_called()
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2"]
+
+
+async def test_changed_content_is_processed(make_worker, pipeline, redis_pubsub_server):
+    worker = make_worker()
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-1")
+    await worker.process_event(make_event("stream-0"))
+    pipeline.text = "changed feed"
+    pipeline.posts.insert(0, make_post("post-3"))
+
+    await worker.process_event(make_event("stream-0"))
+
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2", "post-3"]
+
+
+async def test_parsing_stops_after_consecutive_seen_posts(
+    settings, make_worker, pipeline, redis_pubsub_server
+):
+    settings.parsers.stop_after_seen = 2
+    pipeline.posts = [make_post(f"post-{i}") for i in range(6, 0, -1)]
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-5", "post-3", "post-2")
+    worker = make_worker()
+
+    posts = await worker.parse_posts_until_seen(
+        make_event("stream-0"), pipeline, "feed", 2
+    )
+    await worker.process_event(make_event("stream-0"))
+
+    assert [post.post_id for post in posts] == [f"post-{i}" for i in range(6, 1, -1)]
+    # new post after one seen is sent, the one after two seen is not parsed
+    assert await sent_post_ids(redis_pubsub_server) == ["post-4", "post-6"]
+
+
+async def test_fetcher_without_cache_key_returning_text(
+    make_worker, pipeline, redis_pubsub_server
+):
+    async def fetch_feed(*, options=None):  # noqa: U100
+        return "feed"
+
+    worker = make_worker()
+    worker._pipelines = Mock(  # noqa: SLF001
+        get=Mock(
+            return_value=Pipeline(
+                key="key",
+                fetcher=fetch_feed,
+                parser=pipeline.parse,
+                modifiers=(),
+                message_template="$title",
+            )
+        )
+    )
+    repository = RedisPostRepository(client=redis_pubsub_server)
+    await repository.mark_post_as_seen("stream-0", "post-1")
+
+    await worker.process_event(make_event("stream-0"))
+
+    assert await sent_post_ids(redis_pubsub_server) == ["post-2"]
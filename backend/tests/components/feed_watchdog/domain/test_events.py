@@ -0,0 +1,106 @@
+import dataclasses
+
+import dacite
+import pytest
+
+from feed_watchdog.domain.events import (
+    MessageBatch,
+    ModifierData,
+    ProcessStreamEvent,
+    SourceData,
+    parse_event,
+)
+
+SOURCE = {
+    "fetcher_type": "fetch_text",
+    "fetcher_options": {"url": "https://example.com/rss"},
+    "parser_type": "rss",
+    "parser_options": {},
+    "tags": ["tag1", "tag2"],
+}
+EVENT = {
+    "slug": "slug",
+    "message_template": "$title $url",
+    "squash": True,
+    "modifiers": [{"type": "shorten", "options": {"max_length": 100}}],
+    "source": SOURCE,
+}
+MESSAGE = {"post_id": "1", "text": "Title https://example.com/1"}
+BATCH = {"stream_slug": "slug", "messages": [MESSAGE]}
+
+
+@pytest.mark.parametrize(
+    "cls,data",
+    [
+        (ProcessStreamEvent, EVENT),
+        (ProcessStreamEvent, {**EVENT, "probabilistic_dedupe": True, "extra": 1}),
+        (ProcessStreamEvent, {**EVENT, "modifiers": [ModifierData("a", {})]}),
+        (ProcessStreamEvent, {**EVENT, "source": SourceData(**SOURCE)}),
+        (MessageBatch, BATCH),
+        (MessageBatch, {"stream_slug": "slug", "messages": []}),
+        (
+            MessageBatch,
+            {
+                "stream_slug": "slug",
+                "messages": [
+                    {**MESSAGE, "template": "$url", "template_kwargs": {"url": "a"}}
+                ],
+            },
+        ),
+    ],
+)
+def test_decode_same_as_dacite(cls, data):
+    result = cls.from_dict(data)
+
+    assert result == dacite.from_dict(data_class=cls, data=data)
+
+
+@pytest.mark.parametrize(
+    "cls,data",
+    [
+        (ProcessStreamEvent, {**EVENT, "squash": 1}),
+        (ProcessStreamEvent, {**EVENT, "slug": None}),
+        (ProcessStreamEvent, {k: v for k, v in EVENT.items() if k != "slug"}),
+        (ProcessStreamEvent, {**EVENT, "probabilistic_dedupe": None}),
+        (ProcessStreamEvent, {**EVENT, "source": {**SOURCE, "tags": ("x",)}}),
+        (ProcessStreamEvent, {**EVENT, "source": {**SOURCE, "tags": None}}),
+        (ProcessStreamEvent, {**EVENT, "source": {"fetcher_type": "a"}}),
+        (ProcessStreamEvent, {**EVENT, "source": "source"}),
+        (ProcessStreamEvent, {**EVENT, "modifiers": [{"type": 1, "options": {}}]}),
+        (ProcessStreamEvent, {**EVENT, "modifiers": ({"type": "a", "options": {}},)}),
+        (MessageBatch, {**BATCH, "stream_slug": True}),
+        (MessageBatch, {**BATCH, "messages": [{**MESSAGE, "template": None}]}),
+        (MessageBatch, {**BATCH, "messages": [{"text": "text"}]}),
+    ],
+)
+def test_decode_errors_same_as_dacite(cls, data):
+    with pytest.raises(dacite.DaciteFieldError) as expected:
+        dacite.from_dict(data_class=cls, data=data)
+
+    with pytest.raises(type(expected.value)) as exc_info:
+        cls.from_dict(data)
+
+    assert exc_info.value.field_path == expected.value.field_path
+
+
+@pytest.mark.parametrize("data", [EVENT, {**EVENT, "probabilistic_dedupe": True}])
+def test_encode_same_as_asdict(data):
+    event = ProcessStreamEvent.from_dict(data)
+
+    result = event.as_dict()
+
+    assert result == {
+        **dataclasses.asdict(event),
+        "__event_name__": "ProcessStreamEvent",
+    }
+    assert parse_event(result) == event
+
+
+def test_roundtrip_of_batch_with_many_messages():
+    event = MessageBatch.from_dict({**BATCH, "messages": [MESSAGE] * 10})
+
+    result = event.as_dict()
+
+    assert result == {**dataclasses.asdict(event), "__event_name__": "MessageBatch"}
+    assert MessageBatch.from_dict(result) == event
+    assert parse_event(result) == event
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from feed_watchdog.handlers import HandlerType, get_handler_by_name
+from feed_watchdog.handlers.executor import init_executor, run_in_executor
+
+FEED = (
+    '<rss version="2.0"><channel><item><guid>1</guid><title>Title</title>'
+    "<link>https://example.com/1</link><category>tag</category></item>"
+    "</channel></rss>"
+)
+
+
+@pytest.fixture()
+def process_pool():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        yield pool
+    init_executor(None)
+
+
+async def test_rss_parser_in_process_pool(process_pool):
+    init_executor(process_pool)
+    parser = get_handler_by_name(type=HandlerType.parsers.value, name="rss")
+
+    result = await parser(FEED)
+
+    assert len(result) == 1
+    assert result[0].post_id == "1"
+    assert result[0].post_tags == ("tag",)
+    assert result[0].source_tags == ()
+
+
+async def test_timeout(process_pool):
+    init_executor(process_pool, timeout=0.1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await run_in_executor(time.sleep, 1)
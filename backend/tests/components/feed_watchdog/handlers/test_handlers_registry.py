@@ -0,0 +1,85 @@
+import pytest
+
+from feed_watchdog.handlers import (
+    HandlersRegistry,
+    HandlerType,
+    get_handler_by_name,
+    get_handlers_registry,
+    invalidate_handlers_registry,
+)
+
+
+class HandlerSpy:
+    instances_count = 0
+
+    def __init__(self, name: str):
+        self.name = name
+        type(self).instances_count += 1
+
+
+@pytest.fixture()
+def registry() -> HandlersRegistry:
+    HandlerSpy.instances_count = 0
+    return HandlersRegistry(
+        {
+            "receivers": {
+                "bot1": ("bot1", HandlerSpy, {"name": "bot1"}, None, None, None),
+                "bot2": ("bot2", HandlerSpy, {"name": "bot2"}, None, None, None),
+            },
+            "modifiers": {"func": ("func", print, None, None, None, None)},
+        }
+    )
+
+
+def test_class_handlers_are_instantiated_lazily(registry):
+    handler = registry.get("receivers", "bot1")
+
+    assert handler.obj.name == "bot1"
+    assert HandlerSpy.instances_count == 1
+
+
+def test_handler_instance_is_reused(registry):
+    first = registry.get("receivers", "bot1")
+    second = registry.get("receivers", "bot1")
+
+    assert first.obj is second.obj
+    assert HandlerSpy.instances_count == 1
+
+
+def test_function_handlers_are_not_instantiated(registry):
+    handler = registry.get("modifiers", "func")
+
+    assert handler.obj is print
+
+
+def test_unknown_handler(registry):
+    with pytest.raises(KeyError):
+        registry.get("receivers", "unknown")
+
+
+def test_as_dict(registry):
+    result = registry.as_dict()
+
+    assert set(result) == {"receivers", "modifiers"}
+    assert set(result["receivers"]) == {"bot1", "bot2"}
+    assert HandlerSpy.instances_count == 2
+
+
+def test_registry_is_built_once():
+    assert get_handlers_registry() is get_handlers_registry()
+
+
+def test_invalidate_handlers_registry():
+    registry = get_handlers_registry()
+
+    invalidate_handlers_registry()
+
+    assert get_handlers_registry() is not registry
+
+
+def test_get_handler_by_name():
+    handler = get_handler_by_name(
+        type=HandlerType.parsers.value, name="rss", options={}
+    )
+
+    assert callable(handler)
@@ -0,0 +1,229 @@
+import dataclasses
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from feed_watchdog.domain.events import ModifierData, SourceData
+from feed_watchdog.handlers import HANDLERS, invalidate_handlers_registry
+from feed_watchdog.handlers.executor import init_executor
+from feed_watchdog.handlers.pipeline import PipelinesCache, pipeline_key
+
+
+def make_source(**kwargs) -> SourceData:
+    return SourceData(
+        **{
+            "fetcher_type": "fetch_text",
+            "fetcher_options": {"url": "https://example.com/rss"},
+            "parser_type": "rss",
+            "parser_options": {},
+            "tags": ["tag1"],
+            **kwargs,
+        }
+    )
+
+
+@pytest.fixture()
+def modifiers() -> list[ModifierData]:
+    return [
+        ModifierData(
+            type="replace_text",
+            options={"field": "title", "old": "Title", "new": "Name"},
+        )
+    ]
+
+
+def test_pipeline_key_is_stable(modifiers):
+    first = pipeline_key(make_source(), modifiers, "$title")
+    second = pipeline_key(make_source(), modifiers, "$title")
+
+    assert first == second
+
+
+@pytest.mark.parametrize(
+    "source,template",
+    [
+        (make_source(fetcher_options={"url": "https://example.com/atom"}), "$title"),
+        (make_source(parser_type="reddit_json"), "$title"),
+        (make_source(tags=["tag2"]), "$title"),
+        (make_source(), "$url"),
+    ],
+)
+def test_pipeline_key_depends_on_stream_config(source, template, modifiers):
+    assert pipeline_key(make_source(), modifiers, "$title") != pipeline_key(
+        source, modifiers, template
+    )
+
+
+def test_pipeline_key_depends_on_modifiers(modifiers):
+    assert pipeline_key(make_source(), modifiers, "$title") != pipeline_key(
+        make_source(), [], "$title"
+    )
+
+
+def test_compiled_pipeline_is_reused(modifiers):
+    cache = PipelinesCache()
+
+    first = cache.get(make_source(), modifiers, "$title")
+    second = cache.get(make_source(), modifiers, "$title")
+
+    assert first is second
+    assert len(cache) == 1
+
+
+def test_least_recently_used_pipeline_is_evicted(modifiers):
+    cache = PipelinesCache(maxsize=2)
+    first = cache.get(make_source(tags=["1"]), modifiers, "$title")
+    cache.get(make_source(tags=["2"]), modifiers, "$title")
+    cache.get(make_source(tags=["1"]), modifiers, "$title")
+
+    cache.get(make_source(tags=["3"]), modifiers, "$title")
+
+    assert len(cache) == 2
+    assert cache.get(make_source(tags=["1"]), modifiers, "$title") is first
+
+
+def test_pipelines_are_cleared_with_handlers_registry(modifiers):
+    cache = PipelinesCache()
+    first = cache.get(make_source(), modifiers, "$title")
+
+    invalidate_handlers_registry()
+
+    assert len(cache) == 0
+    assert cache.get(make_source(), modifiers, "$title") is not first
+
+
+async def plain_fetcher(*, options=None) -> str:  # noqa: U100
+    return "feed"
+
+
+@pytest.fixture()
+def _register_plain_fetcher(monkeypatch):
+    monkeypatch.setitem(
+        HANDLERS["fetchers"],
+        "plain",
+        ("plain", plain_fetcher, None, None, None, None),
+    )
+    invalidate_handlers_registry()
+    yield
+    monkeypatch.undo()
+    invalidate_handlers_registry()
+
+
+@pytest.mark.usefixtures("_register_plain_fetcher")
+async def test_cache_key_is_not_passed_to_fetcher_without_it():
+    pipeline = PipelinesCache().get(make_source(fetcher_type="plain"), [], "$title")
+
+    result = await pipeline.fetch(cache_key="stream")
+
+    assert pipeline.conditional_fetcher is False
+    assert result == "feed"
+
+
+def test_fetch_text_supports_cache_key():
+    pipeline = PipelinesCache().get(make_source(), [], "$title")
+
+    assert pipeline.conditional_fetcher is True
+
+
+async def test_pipeline_applies_modifiers_in_order():
+    modifiers = [
+        ModifierData(
+            type="replace_text",
+            options={"field": "title", "old": "Title", "new": "Name"},
+        ),
+        ModifierData(
+            type="replace_text",
+            options={"field": "title", "old": "Name", "new": "Header"},
+        ),
+    ]
+    pipeline = PipelinesCache().get(make_source(), modifiers, "$title")
+    posts = await pipeline.parse(
+        '<rss version="2.0"><channel><item><guid>1</guid><title>Title</title>'
+        "<link>https://example.com/1</link></item></channel></rss>"
+    )
+
+    result = await pipeline.modify(posts)
+
+    assert [post.title for post in result] == ["Header"]
+
+
+FEED = (
+    '<rss version="2.0"><channel>'
+    + "".join(
+        f"<item><guid>{i}</guid><title>Title {i}</title></item>" for i in range(5)
+    )
+    + "</channel></rss>"
+)
+
+
+async def test_lazy_parser_yields_posts_by_batches():
+    pipeline = PipelinesCache().get(make_source(parser_type="rss_fast"), [], "$title")
+
+    batches = [
+        [post.post_id for post in batch]
+        async for batch in pipeline.iter_parse(FEED, batch_size=2)
+    ]
+
+    assert batches == [["0", "1"], ["2", "3"], ["4"]]
+
+
+async def test_lazy_parser_stops_with_consumer():
+    pipeline = PipelinesCache().get(make_source(parser_type="rss_fast"), [], "$title")
+    batches = pipeline.iter_parse(FEED, batch_size=2)
+
+    first = await anext(batches)
+    await batches.aclose()
+
+    assert [post.post_id for post in first] == ["0", "1"]
+
+
+async def test_not_lazy_parser_yields_all_posts_in_one_batch():
+    pipeline = PipelinesCache().get(make_source(parser_type="rss"), [], "$title")
+
+    batches = [
+        [post.post_id for post in batch]
+        async for batch in pipeline.iter_parse(FEED, batch_size=2)
+    ]
+
+    assert batches == [["0", "1", "2", "3", "4"]]
+
+
+@pytest.fixture()
+def reset_executor():
+    yield
+    init_executor(None)
+
+
+async def test_lazy_parser_stops_on_executor_timeout(reset_executor):
+    pipeline = PipelinesCache().get(make_source(parser_type="rss_fast"), [], "$title")
+    iter_posts = pipeline.lazy_parser
+
+    def slow_iter_posts(text):
+        for i, post in enumerate(iter_posts(text)):
+            if i == 2:
+                time.sleep(0.5)
+            yield post
+
+    pipeline = dataclasses.replace(pipeline, lazy_parser=slow_iter_posts)
+    init_executor(None, timeout=0.1)
+
+    batches = [
+        [post.post_id for post in batch]
+        async for batch in pipeline.iter_parse(FEED, batch_size=2)
+    ]
+
+    assert batches == [["0", "1"]]
+
+
+async def test_lazy_parser_is_not_used_with_process_pool(reset_executor):
+    pipeline = PipelinesCache().get(make_source(parser_type="rss_fast"), [], "$title")
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        init_executor(pool)
+        batches = [
+            [post.post_id for post in batch]
+            async for batch in pipeline.iter_parse(FEED, batch_size=2)
+        ]
+
+    assert batches == [["0", "1", "2", "3", "4"]]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from feed_watchdog.handlers import HandlerType, get_handler_by_name
+from feed_watchdog.handlers.parsers import reddit_json
+
+LISTING = {
+    "kind": "Listing",
+    "data": {
+        "after": "t3_2",
+        "dist": 2,
+        "children": [
+            {
+                "kind": "t3",
+                "data": {
+                    "id": f"id{i}",
+                    "title": f"Title {i}",
+                    "url": f"https://example.com/{i}",
+                    "permalink": f"/r/Python/comments/id{i}/title/",
+                    "score": i * 10,
+                    "selftext": "text",
+                    "media_metadata": {"abc": {"id": "abc", "s": {"u": "url"}}},
+                    "crosspost_parent_list": [
+                        {
+                            "id": "other",
+                            "title": "Other",
+                            "url": "https://example.com/other",
+                            "permalink": "/r/other/",
+                            "score": 1,
+                        }
+                    ],
+                },
+            }
+            for i in range(2)
+        ],
+        "before": None,
+    },
+}
+
+
+@pytest.fixture()
+def codec():
+    yield
+    reddit_json.init_codec("stream")
+
+
+@pytest.mark.parametrize("name", ["stream", "orjson"])
+async def test_parse_listing(name, codec):
+    if name != "stream":
+        pytest.importorskip(name)
+    reddit_json.init_codec(name)
+    parser = get_handler_by_name(type=HandlerType.parsers.value, name="reddit_json")
+
+    result = await parser(json.dumps(LISTING))
+
+    assert [post.template_kwargs() for post in result] == [
+        {
+            "post_id": f"id{i}",
+            "title": f"Title {i}",
+            "url": f"https://example.com/{i}",
+            "comments": f"https://reddit.com/r/Python/comments/id{i}/title/",
+            "score": i * 10,
+            "source_tags": "",
+            "source_hash_tags": "",
+        }
+        for i in range(2)
+    ]
+
+
+def test_stream_decoder_drops_unused_objects():
+    decoded = reddit_json._pruning_decoder.decode(json.dumps(LISTING))  # noqa: SLF001
+
+    assert decoded["data"]["children"][0] == {
+        "data": {
+            "id": "id0",
+            "title": "Title 0",
+            "url": "https://example.com/0",
+            "permalink": "/r/Python/comments/id0/title/",
+            "score": 0,
+        }
+    }
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown or not installed"):
+        reddit_json.init_codec("unknown")
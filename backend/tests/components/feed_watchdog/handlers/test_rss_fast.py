@@ -0,0 +1,94 @@
+from pathlib import Path
+from xml.etree.ElementTree import ParseError
+
+import pytest
+
+from feed_watchdog.handlers import (
+    HandlerType,
+    get_handler_by_name,
+    get_lazy_parser_by_name,
+)
+from feed_watchdog.handlers.parsers.rss import parse_feed
+from feed_watchdog.handlers.parsers.rss_fast import (
+    FEEDPARSER_NAMESPACES,
+    FallbackRequired,
+    parse_fast,
+)
+
+FEEDS_DIR = Path(__file__).parent / "feeds"
+FEEDS = sorted(FEEDS_DIR.glob("*.xml"), key=lambda path: path.name)
+
+
+def _read(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("path", FEEDS, ids=lambda path: path.stem)
+async def test_parity_with_rss_parser(path):
+    text = _read(path)
+    rss = get_handler_by_name(type=HandlerType.parsers.value, name="rss")
+    rss_fast = get_handler_by_name(type=HandlerType.parsers.value, name="rss_fast")
+
+    result = await rss_fast(text)
+
+    assert result
+    assert result == await rss(text)
+
+
+@pytest.mark.parametrize(
+    "path",
+    [path for path in FEEDS if not path.stem.startswith("fallback_")],
+    ids=lambda path: path.stem,
+)
+def test_parsed_without_fallback(path):
+    text = _read(path)
+
+    assert parse_fast(text) == parse_feed(text)
+
+
+@pytest.mark.parametrize(
+    "path",
+    [path for path in FEEDS if path.stem.startswith("fallback_")],
+    ids=lambda path: path.stem,
+)
+def test_fallback_required(path):
+    with pytest.raises((FallbackRequired, ParseError)):
+        parse_fast(_read(path))
+
+
+def test_namespaces_are_same_as_feedparser():
+    module = pytest.importorskip("feedparser.mixin")
+    mixin = getattr(module, "_FeedParserMixin", None)
+    if mixin is None:
+        pytest.skip("feedparser doesn't have namespaces mixin anymore")
+
+    assert mixin.namespaces == FEEDPARSER_NAMESPACES
+
+
+def test_empty_text():
+    assert parse_fast("") == []
+
+
+def test_lazy_parser_doesnt_repeat_posts_after_fallback():
+    # second entry has no title, so fast parser falls back in the middle
+    text = (
+        '<rss version="2.0"><channel>'
+        "<item><guid>1</guid><title>First</title></item>"
+        "<item><guid>2</guid></item>"
+        "<item><guid>3</guid><title>Third</title></item>"
+        "</channel></rss>"
+    )
+    parser = get_lazy_parser_by_name(name="rss_fast")
+
+    posts = list(parser(text))
+
+    assert [post.post_id for post in posts] == ["1", "3"]
+
+
+@pytest.mark.parametrize("name", ["rss", "rss_fast"])
+async def test_posts_have_no_instance_dict(name):
+    parser = get_handler_by_name(type=HandlerType.parsers.value, name=name)
+
+    result = await parser(_read(FEEDS_DIR / "github_releases.xml"))
+
+    assert not hasattr(result[0], "__dict__")
@@ -0,0 +1,167 @@
+import asyncio
+
+import httpx
+import pytest
+
+from feed_watchdog.domain.models import NOT_MODIFIED
+from feed_watchdog.http import (
+    ValidatorsCache,
+    core,
+    fetch_from_url,
+    fetch_text_from_url,
+    init_client,
+)
+
+
+class HandlerSpy:
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            text=f"feed from {request.url.host}",
+            headers={"etag": '"v1"', "last-modified": "Wed, 21 Oct 2015 07:28:00 GMT"},
+        )
+
+
+@pytest.fixture()
+def handler_spy():
+    return HandlerSpy()
+
+
+@pytest.fixture()
+async def client(handler_spy):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler_spy)) as client:
+        yield client
+
+
+@pytest.fixture()
+def init_shared_client(monkeypatch, client):
+    monkeypatch.setattr(core, "_client", None)
+    monkeypatch.setattr(core, "_max_connections_per_host", None)
+    monkeypatch.setattr(core, "_validators_cache", None)
+
+    def init(max_connections_per_host=None, validators_cache=None):
+        init_client(
+            client,
+            max_connections_per_host=max_connections_per_host,
+            validators_cache=validators_cache,
+        )
+
+    return init
+
+
+async def test_fetch_with_shared_client(init_shared_client, client, handler_spy):
+    init_shared_client()
+
+    result = await fetch_text_from_url("https://example.com/rss")
+    await fetch_text_from_url("https://example.com/atom")
+
+    assert result == "feed from example.com"
+    assert len(handler_spy.requests) == 2
+    assert not client.is_closed
+
+
+async def test_limit_connections_per_host(init_shared_client, handler_spy):
+    init_shared_client(max_connections_per_host=2)
+
+    await asyncio.gather(
+        *[fetch_text_from_url(f"https://example.com/{i}") for i in range(6)]
+    )
+
+    assert len(handler_spy.requests) == 6
+    assert handler_spy.max_in_flight == 2
+
+
+async def test_limit_is_applied_to_each_host_separately(
+    init_shared_client, handler_spy
+):
+    init_shared_client(max_connections_per_host=1)
+
+    await asyncio.gather(
+        fetch_text_from_url("https://example.com/rss"),
+        fetch_text_from_url("https://example.org/rss"),
+    )
+
+    assert handler_spy.max_in_flight == 2
+
+
+async def test_semaphores_of_idle_hosts_are_removed(init_shared_client):
+    init_shared_client(max_connections_per_host=1)
+
+    await asyncio.gather(
+        *[fetch_text_from_url(f"https://host{i}.example.com/rss") for i in range(3)],
+        fetch_text_from_url("https://host0.example.com/atom"),
+    )
+
+    assert core._host_semaphores == {}  # noqa: SLF001
+
+
+@pytest.fixture()
+def validators_cache(redis_pubsub_server):
+    return ValidatorsCache(redis_client=redis_pubsub_server)
+
+
+async def test_return_not_modified_if_content_is_not_changed(
+    init_shared_client, validators_cache, handler_spy
+):
+    init_shared_client(validators_cache=validators_cache)
+
+    first = await fetch_from_url("https://example.com/rss", cache_key="stream")
+    await validators_cache.save("stream", first.url, first.validators)
+    second = await fetch_from_url("https://example.com/rss", cache_key="stream")
+
+    assert first.text == "feed from example.com"
+    assert second is NOT_MODIFIED
+    assert handler_spy.requests[1].headers["if-none-match"] == '"v1"'
+    assert (
+        handler_spy.requests[1].headers["if-modified-since"]
+        == "Wed, 21 Oct 2015 07:28:00 GMT"
+    )
+
+
+async def test_fetch_full_content_until_validators_are_saved(
+    init_shared_client, validators_cache, handler_spy
+):
+    init_shared_client(validators_cache=validators_cache)
+
+    await fetch_from_url("https://example.com/rss", cache_key="stream")
+    result = await fetch_from_url("https://example.com/rss", cache_key="stream")
+
+    assert result.text == "feed from example.com"
+    assert "if-none-match" not in handler_spy.requests[1].headers
+
+
+async def test_validators_are_not_shared_between_cache_keys(
+    init_shared_client, validators_cache
+):
+    init_shared_client(validators_cache=validators_cache)
+
+    first = await fetch_from_url("https://example.com/rss", cache_key="stream1")
+    await validators_cache.save("stream1", first.url, first.validators)
+    result = await fetch_text_from_url("https://example.com/rss", cache_key="stream2")
+
+    assert result == "feed from example.com"
+
+
+async def test_dont_make_conditional_request_without_cache_key(
+    init_shared_client, validators_cache, handler_spy
+):
+    init_shared_client(validators_cache=validators_cache)
+
+    first = await fetch_from_url("https://example.com/rss")
+    await validators_cache.save("", first.url, first.validators)
+    result = await fetch_text_from_url("https://example.com/rss")
+
+    assert result == "feed from example.com"
+    assert "if-none-match" not in handler_spy.requests[1].headers
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from feed_watchdog.pubsub import codecs
+from feed_watchdog.pubsub.codecs import (
+    CODEC_FIELD,
+    PAYLOAD_FIELD,
+    decode_message,
+    encode_envelope,
+    encode_message,
+    get_codec,
+)
+from feed_watchdog.pubsub.publisher import Publisher
+from feed_watchdog.pubsub.subscriber import Subscriber
+
+DATA = {
+    "__event_name__": "MessageBatch",
+    "stream_slug": "slug",
+    "messages": [{"post_id": "1", "text": "Привет", "template_kwargs": {}}],
+    "big_int": 2**70,
+    "none": None,
+}
+
+
+@pytest.fixture(
+    params=[
+        codecs.stdlib_json_codec,
+        pytest.param(
+            codecs.orjson_codec,
+            marks=pytest.mark.skipif(
+                codecs.orjson_codec is None, reason="orjson is not installed"
+            ),
+        ),
+    ],
+    ids=["stdlib", "orjson"],
+)
+def codec(request):
+    return request.param
+
+
+def test_roundtrip(codec):
+    encoded = encode_message(DATA, codec)
+
+    assert CODEC_FIELD not in encoded
+    assert decode_message(encoded) == DATA
+
+
+def test_messages_are_readable_by_consumers_without_codecs(codec):
+    encoded = encode_message(DATA, codec)
+
+    assert {key: json.loads(value) for key, value in encoded.items()} == DATA
+
+
+def test_decode_legacy_message():
+    message = {key: json.dumps(value) for key, value in DATA.items()}
+
+    assert decode_message(message) == DATA
+
+
+def test_decode_message_with_codec_field():
+    message = {key: json.dumps(value) for key, value in DATA.items()}
+    message[CODEC_FIELD] = '"json"'
+
+    assert decode_message(message) == DATA
+
+
+def test_decode_stdlib_json_specific_values(codec):
+    assert str(codec.decode(json.dumps(float("nan")))) == "nan"
+
+
+def test_roundtrip_of_non_finite_floats(codec):
+    data = {"values": [float("nan"), float("inf")], "none": None}
+
+    encoded = encode_message(data, codec)
+
+    assert encoded == encode_message(data, codecs.stdlib_json_codec)
+    assert str(decode_message(encoded)) == str(data)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="msgpack"):
+        decode_message({"key": b"\x01", CODEC_FIELD: '"msgpack"'})
+
+    with pytest.raises(ValueError, match="msgpack"):
+        get_codec("msgpack")
+
+
+@pytest.mark.parametrize(
+    "compress_threshold,header",
+    [(0, "1:json::"), (10**6, "1:json::"), (100, "1:json:zlib:")],
+)
+def test_envelope_roundtrip(codec, compress_threshold, header):
+    encoded = encode_envelope(DATA, codec, compress_threshold=compress_threshold)
+    # pub/sub redis client decodes responses to str
+    message = {key: value.decode("utf-8") for key, value in encoded.items()}
+
+    assert list(message) == [PAYLOAD_FIELD]
+    assert message[PAYLOAD_FIELD].startswith(header)
+    assert decode_message(message) == DATA
+
+
+def test_compressed_envelope_is_smaller(codec):
+    data = {**DATA, "messages": DATA["messages"] * 100}
+
+    encoded = encode_envelope(data, codec, compress_threshold=100)
+
+    assert len(encoded[PAYLOAD_FIELD]) < len(codec.encode(data)) / 2
+
+
+@pytest.mark.parametrize(
+    "payload",
+    ["2:json::{}", "1:msgpack::{}", "1:json:lz4:{}", "1:json:zlib:!!!", "{}"],
+)
+def test_invalid_envelope(payload):
+    with pytest.raises(ValueError):
+        decode_message({PAYLOAD_FIELD: payload})
+
+
+@pytest.mark.parametrize("message_format", ["fields", "envelope"])
+async def test_publish_and_read(redis_pubsub_server, message_format):
+    publisher = Publisher(
+        redis_pubsub_server, message_format=message_format, compress_threshold=100
+    )
+    subscriber = Subscriber(
+        redis_client=redis_pubsub_server,
+        topic_name="topic",
+        group_id="group",
+        consumer_id="consumer",
+    )
+
+    await publisher.publish("topic", DATA)
+    messages = [data async for _, data in subscriber.read()]
+
+    assert messages == [DATA]
@@ -0,0 +1,30 @@
+import pytest
+
+from feed_watchdog.pubsub.codecs import decode_message
+from feed_watchdog.pubsub.publisher import Publisher
+
+TOPIC = "topic"
+
+
+async def read_all(redis_client) -> list[dict]:
+    return [decode_message(data) for _, data in await redis_client.xrange(TOPIC)]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 7])
+async def test_publish_many(redis_pubsub_server, count):
+    publisher = Publisher(redis_pubsub_server)
+    events = [{"number": i} for i in range(count)]
+
+    result = await publisher.publish_many(TOPIC, iter(events), chunk_size=3)
+
+    assert result == count
+    assert await read_all(redis_pubsub_server) == events
+
+
+async def test_publish_many_in_envelopes(redis_pubsub_server):
+    publisher = Publisher(redis_pubsub_server, message_format="envelope")
+    events = [{"number": i} for i in range(3)]
+
+    await publisher.publish_many(TOPIC, events)
+
+    assert await read_all(redis_pubsub_server) == events
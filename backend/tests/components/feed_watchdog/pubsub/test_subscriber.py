@@ -0,0 +1,376 @@
+import asyncio
+import os
+import socket
+import time
+from contextlib import aclosing
+
+import pytest
+
+from feed_watchdog.pubsub.dead_letters import list_dead_letters, replay_dead_letter
+from feed_watchdog.pubsub.publisher import Publisher
+from feed_watchdog.pubsub.subscriber import Subscriber, make_consumer_id
+
+TOPIC = "topic"
+GROUP = "group"
+
+
+@pytest.fixture()
+def publisher(redis_pubsub_server):
+    return Publisher(redis_pubsub_server)
+
+
+@pytest.fixture()
+def subscriber(redis_pubsub_server):
+    return Subscriber(
+        redis_client=redis_pubsub_server,
+        topic_name=TOPIC,
+        group_id=GROUP,
+        consumer_id="consumer",
+    )
+
+
+async def publish(publisher, count: int) -> None:
+    for i in range(count):
+        await publisher.publish(TOPIC, {"number": i})
+
+
+async def test_iter_batches_yields_full_batches(publisher, subscriber):
+    await publish(publisher, 5)
+
+    async with aclosing(subscriber.iter_batches(max_size=2, max_wait=60)) as batches:
+        result = [await anext(batches), await anext(batches)]
+
+    assert [[data for _, data in batch] for batch in result] == [
+        [{"number": 0}, {"number": 1}],
+        [{"number": 2}, {"number": 3}],
+    ]
+
+
+async def test_iter_batches_yields_incomplete_batch_after_max_wait(
+    publisher, subscriber
+):
+    await publish(publisher, 3)
+
+    async with aclosing(subscriber.iter_batches(max_size=10, max_wait=0.3)) as batches:
+        start = time.monotonic()
+        batch = await asyncio.wait_for(anext(batches), timeout=5)
+
+    assert len(batch) == 3
+    assert time.monotonic() - start >= 0.3
+
+
+async def test_iter_batches_reads_only_up_to_capacity(
+    publisher, subscriber, redis_pubsub_server
+):
+    await publish(publisher, 5)
+
+    async with aclosing(subscriber.iter_batches(capacity=lambda: 2)) as batches:
+        batch = await anext(batches)
+
+    pending = await redis_pubsub_server.xpending(TOPIC, GROUP)
+    assert len(batch) == 2
+    assert pending["pending"] == 2
+
+
+async def test_commit_many(publisher, subscriber, redis_pubsub_server):
+    await publish(publisher, 3)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        batch = await anext(batches)
+
+    result = await subscriber.commit_many([msg_id for msg_id, _ in batch])
+
+    pending = await redis_pubsub_server.xpending(TOPIC, GROUP)
+    assert len(batch) == 3
+    assert result == 3
+    assert pending["pending"] == 0
+
+
+async def test_commit_many_doesnt_count_already_committed(publisher, subscriber):
+    await publish(publisher, 2)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        batch = await anext(batches)
+    await subscriber.commit(batch[0][0])
+
+    result = await subscriber.commit_many([msg_id for msg_id, _ in batch])
+
+    assert result == 1
+
+
+async def test_touch_resets_idle_time(publisher, subscriber, redis_pubsub_server):
+    await publish(publisher, 1)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+    await asyncio.sleep(0.2)
+
+    await subscriber.touch([msg_id])
+
+    [pending] = await redis_pubsub_server.xpending_range(TOPIC, GROUP, "-", "+", 1)
+    assert pending["time_since_delivered"] < 200
+    assert pending["times_delivered"] == 1
+
+
+async def test_idle_reads_block_until_backlog_check(redis_pubsub_server, monkeypatch):
+    subscriber = Subscriber(
+        redis_client=redis_pubsub_server,
+        topic_name=TOPIC,
+        group_id=GROUP,
+        consumer_id="consumer",
+        read_block_timeout=5000,
+        check_backlog_interval=2,
+    )
+    blocks = []
+    xreadgroup = redis_pubsub_server.xreadgroup
+
+    async def spy_xreadgroup(*args, block, **kwargs):
+        blocks.append(block)
+        return await xreadgroup(*args, block=block, **kwargs)
+
+    monkeypatch.setattr(redis_pubsub_server, "xreadgroup", spy_xreadgroup)
+
+    async with aclosing(subscriber.iter_batches()) as batches:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(batches), timeout=0.1)
+
+    assert 1900 <= blocks[-1] <= 2000
+
+
+def make_subscriber(redis_client, consumer_id: str, **kwargs) -> Subscriber:
+    return Subscriber(
+        redis_client=redis_client,
+        topic_name=TOPIC,
+        group_id=GROUP,
+        consumer_id=consumer_id,
+        **kwargs,
+    )
+
+
+async def read_batch(subscriber, timeout: float = 5) -> list[dict]:
+    async with aclosing(subscriber.iter_batches()) as batches:
+        batch = await asyncio.wait_for(anext(batches), timeout=timeout)
+    return [data for _, data in batch]
+
+
+async def test_restarted_consumer_gets_its_pending_messages(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 2)
+    await read_batch(make_subscriber(redis_pubsub_server, "consumer"))
+
+    result = await read_batch(make_subscriber(redis_pubsub_server, "consumer"))
+
+    assert result == [{"number": 0}, {"number": 1}]
+
+
+async def test_reap_dead_consumers(publisher, redis_pubsub_server):
+    await publish(publisher, 2)
+    await read_batch(make_subscriber(redis_pubsub_server, "dead"))
+    await asyncio.sleep(0.1)
+    subscriber = make_subscriber(
+        redis_pubsub_server, "alive", dead_consumer_idle_time=50
+    )
+
+    result = [data async for _, data in subscriber.reap_dead_consumers()]
+
+    consumers = await redis_pubsub_server.xinfo_consumers(TOPIC, GROUP)
+    assert result == [{"number": 0}, {"number": 1}]
+    assert [consumer["name"] for consumer in consumers] == ["alive"]
+
+
+async def test_reap_dead_consumers_up_to_count(publisher, redis_pubsub_server):
+    await publish(publisher, 3)
+    await read_batch(make_subscriber(redis_pubsub_server, "dead"))
+    await asyncio.sleep(0.1)
+    subscriber = make_subscriber(
+        redis_pubsub_server, "alive", dead_consumer_idle_time=50
+    )
+
+    first = [data async for _, data in subscriber.reap_dead_consumers(count=2)]
+    consumers = await redis_pubsub_server.xinfo_consumers(TOPIC, GROUP)
+    rest = [data async for _, data in subscriber.reap_dead_consumers(count=2)]
+
+    assert first == [{"number": 0}, {"number": 1}]
+    assert sorted(consumer["name"] for consumer in consumers) == ["alive", "dead"]
+    assert rest == [{"number": 2}]
+
+
+async def test_claim_messages_of_dead_consumers_up_to_capacity(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 5)
+    await read_batch(make_subscriber(redis_pubsub_server, "dead"))
+    await asyncio.sleep(0.1)
+    subscriber = make_subscriber(
+        redis_pubsub_server,
+        "alive",
+        dead_consumer_idle_time=50,
+        check_backlog_interval=0.05,
+    )
+
+    async with aclosing(subscriber.iter_batches(capacity=lambda: 2)) as batches:
+        batch = await asyncio.wait_for(anext(batches), timeout=5)
+
+    pending = await redis_pubsub_server.xpending_range(
+        TOPIC, GROUP, "-", "+", 10, consumername="alive"
+    )
+    assert len(batch) == 2
+    assert len(pending) == 2
+
+
+async def test_dont_reap_active_consumers(publisher, redis_pubsub_server):
+    await publish(publisher, 2)
+    await read_batch(make_subscriber(redis_pubsub_server, "other"))
+    subscriber = make_subscriber(
+        redis_pubsub_server, "alive", dead_consumer_idle_time=60 * 1000
+    )
+
+    result = [data async for _, data in subscriber.reap_dead_consumers()]
+
+    consumers = await redis_pubsub_server.xinfo_consumers(TOPIC, GROUP)
+    assert result == []
+    assert [consumer["name"] for consumer in consumers] == ["other"]
+
+
+async def test_failed_message_stays_pending_until_max_deliveries(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(redis_pubsub_server, "consumer", max_deliveries=2)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+
+    result = await subscriber.fail(msg_id, "error")
+
+    pending = await redis_pubsub_server.xpending(TOPIC, GROUP)
+    assert result is False
+    assert pending["pending"] == 1
+    assert await list_dead_letters(redis_pubsub_server, TOPIC) == []
+
+
+async def test_failed_message_is_moved_to_dead_letters(publisher, redis_pubsub_server):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(redis_pubsub_server, "consumer", max_deliveries=1)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+
+    result = await subscriber.fail(msg_id, "error")
+
+    pending = await redis_pubsub_server.xpending(TOPIC, GROUP)
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+    assert result is True
+    assert pending["pending"] == 0
+    assert dead_letter.message_id == msg_id
+    assert dead_letter.group == GROUP
+    assert dead_letter.deliveries == 1
+    assert dead_letter.error == "error"
+    assert dead_letter.data == {"number": 0}
+
+
+async def test_failed_message_is_processed_max_deliveries_times(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(
+        redis_pubsub_server,
+        "consumer",
+        max_deliveries=2,
+        autoclaim_min_idle_time=0,
+        check_backlog_interval=0.05,
+    )
+    attempts = 0
+    moved = False
+    async with aclosing(subscriber.iter_batches()) as batches:
+        while not moved:
+            [(msg_id, _)] = await asyncio.wait_for(anext(batches), timeout=5)
+            attempts += 1
+            moved = await subscriber.fail(msg_id, "error")
+
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+    assert attempts == 2
+    assert dead_letter.deliveries == 2
+
+
+def make_claiming_subscriber(redis_client, consumer_id: str) -> Subscriber:
+    return make_subscriber(
+        redis_client,
+        consumer_id,
+        max_deliveries=2,
+        autoclaim_min_idle_time=0,
+        check_backlog_interval=0.05,
+    )
+
+
+async def test_not_acknowledged_message_is_processed_max_deliveries_times(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 1)
+    # first consumer crashes while processing the message
+    await read_batch(make_subscriber(redis_pubsub_server, "crashed"))
+
+    # the second attempt is the last one, it crashes too
+    assert await read_batch(
+        make_claiming_subscriber(redis_pubsub_server, "consumer1")
+    ) == [{"number": 0}]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await read_batch(
+            make_claiming_subscriber(redis_pubsub_server, "consumer2"), timeout=0.3
+        )
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+    assert dead_letter.deliveries == 3
+    assert dead_letter.data == {"number": 0}
+
+
+async def test_replay_dead_letter(publisher, redis_pubsub_server):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(redis_pubsub_server, "consumer", max_deliveries=1)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+    await subscriber.fail(msg_id, "error")
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+
+    await replay_dead_letter(redis_pubsub_server, TOPIC, dead_letter)
+
+    assert await read_batch(subscriber) == [{"number": 0}]
+    assert await list_dead_letters(redis_pubsub_server, TOPIC) == []
+
+
+async def test_replay_dead_letter_of_trimmed_message_is_refused(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(redis_pubsub_server, "consumer", max_deliveries=1)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+    await redis_pubsub_server.xtrim(TOPIC, maxlen=0)
+    await subscriber.fail(msg_id, "error")
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+
+    with pytest.raises(ValueError, match="trimmed"):
+        await replay_dead_letter(redis_pubsub_server, TOPIC, dead_letter)
+
+    assert dead_letter.fields == {}
+    assert await list_dead_letters(redis_pubsub_server, TOPIC) == [dead_letter]
+
+
+async def test_replay_dead_letter_to_topic_with_other_groups_is_refused(
+    publisher, redis_pubsub_server
+):
+    await publish(publisher, 1)
+    subscriber = make_subscriber(redis_pubsub_server, "consumer", max_deliveries=1)
+    async with aclosing(subscriber.iter_batches()) as batches:
+        [(msg_id, _)] = await anext(batches)
+    await subscriber.fail(msg_id, "error")
+    await redis_pubsub_server.xgroup_create(TOPIC, "other-group", id="0")
+    [dead_letter] = await list_dead_letters(redis_pubsub_server, TOPIC)
+
+    with pytest.raises(ValueError, match="consumer groups"):
+        await replay_dead_letter(redis_pubsub_server, TOPIC, dead_letter)
+
+    assert await redis_pubsub_server.xlen(TOPIC) == 1
+    assert await list_dead_letters(redis_pubsub_server, TOPIC) == [dead_letter]
+
+
+def test_make_consumer_id():
+    result = make_consumer_id("{hostname}-{pid}")
+
+    assert result == f"{socket.gethostname()}-{os.getpid()}"
@@ -0,0 +1,92 @@
+import pytest
+
+from feed_watchdog.pubsub.trimming import safe_trim, stream_stats
+
+TOPIC = "topic"
+GROUP = "group"
+
+
+@pytest.fixture()
+async def old_messages(redis_pubsub_server) -> list[str]:
+    # more messages than fit in one node of the stream,
+    #   otherwise approximate trimming doesn't remove anything
+    return [
+        await redis_pubsub_server.xadd(TOPIC, {"number": i}, id=f"{i}-0")
+        for i in range(1, 301)
+    ]
+
+
+async def remaining_ids(redis_client) -> list[str]:
+    return [msg_id for msg_id, _ in await redis_client.xrange(TOPIC)]
+
+
+@pytest.fixture()
+async def read_messages(redis_pubsub_server, old_messages) -> list[str]:
+    """All messages are read and acknowledged by the group"""
+    await redis_pubsub_server.xgroup_create(TOPIC, GROUP, id="$")
+    return old_messages
+
+
+async def test_trim_old_messages(redis_pubsub_server, read_messages):
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_age=60)
+
+    assert result > 0
+    assert await redis_pubsub_server.xlen(TOPIC) == len(read_messages) - result
+
+
+async def test_dont_trim_pending_and_unread_messages(redis_pubsub_server, old_messages):
+    await redis_pubsub_server.xgroup_create(TOPIC, GROUP, id="0")
+    response = await redis_pubsub_server.xreadgroup(
+        GROUP, "consumer", {TOPIC: ">"}, count=200
+    )
+    delivered = [msg_id for msg_id, _ in response[0][1]]
+    await redis_pubsub_server.xack(TOPIC, GROUP, *delivered[:100])
+
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_age=60)
+
+    assert 0 < result <= 100
+    assert set(old_messages[100:]) <= set(await remaining_ids(redis_pubsub_server))
+
+
+async def test_dont_trim_messages_of_group_that_didnt_read_them(
+    redis_pubsub_server, old_messages
+):
+    await redis_pubsub_server.xgroup_create(TOPIC, GROUP, id="0")
+
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_age=60)
+
+    assert result == 0
+    assert await remaining_ids(redis_pubsub_server) == old_messages
+
+
+async def test_dont_trim_messages_of_topic_without_groups(
+    redis_pubsub_server, old_messages
+):
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_age=60, max_len=100)
+
+    assert result == 0
+    assert await remaining_ids(redis_pubsub_server) == old_messages
+
+
+async def test_trim_by_length(redis_pubsub_server, read_messages):
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_len=100)
+
+    assert result > 0
+    assert await redis_pubsub_server.xlen(TOPIC) >= 100
+
+
+async def test_dont_trim_new_messages(redis_pubsub_server):
+    for i in range(300):
+        await redis_pubsub_server.xadd(TOPIC, {"number": i})
+    await redis_pubsub_server.xgroup_create(TOPIC, GROUP, id="$")
+
+    result = await safe_trim(redis_pubsub_server, TOPIC, max_age=60)
+
+    assert result == 0
+    assert await redis_pubsub_server.xlen(TOPIC) == 300
+
+
+async def test_stream_stats(redis_pubsub_server, old_messages):
+    result = await stream_stats(redis_pubsub_server, TOPIC)
+
+    assert result.length == len(old_messages)
@@ -0,0 +1,184 @@
+import pytest
+
+from feed_watchdog.repositories.post import (
+    RedisBloomPostRepository,
+    RedisPostRepository,
+    RedisSortedSetPostRepository,
+)
+
+
+@pytest.fixture()
+def repo(redis_pubsub_server) -> RedisPostRepository:
+    return RedisPostRepository(client=redis_pubsub_server)
+
+
+async def test_content_digest_is_empty_by_default(repo):
+    result = await repo.get_content_digest("my-stream")
+
+    assert result is None
+
+
+async def test_save_content_digest(repo):
+    await repo.save_content_digest("my-stream", "digest1")
+    await repo.save_content_digest("my-stream", "digest2")
+    await repo.save_content_digest("other-stream", "digest3")
+
+    assert await repo.get_content_digest("my-stream") == "digest2"
+    assert await repo.get_content_digest("other-stream") == "digest3"
+
+
+async def test_filter_unseen(repo):
+    await repo.mark_post_as_seen("my-stream", "post1", "post3")
+    await repo.mark_post_as_seen("other-stream", "post2")
+
+    result = await repo.filter_unseen("my-stream", ["post1", "post2", "post3", "post4"])
+
+    assert result == {"post2", "post4"}
+
+
+async def test_filter_unseen_without_post_ids(repo):
+    result = await repo.filter_unseen("my-stream", [])
+
+    assert result == set()
+
+
+async def test_with_client_writes_to_pipeline(repo, redis_pubsub_server):
+    async with redis_pubsub_server.pipeline(transaction=True) as pipe:
+        await repo.with_client(pipe).mark_post_as_seen("my-stream", "post1")
+
+        assert await repo.seen_posts_count("my-stream") == 0
+        await pipe.execute()
+
+    assert await repo.seen_posts_count("my-stream") == 1
+
+
+@pytest.fixture()
+def set_time(monkeypatch):
+    def setter(timestamp: int):
+        monkeypatch.setattr(
+            "feed_watchdog.repositories.post.time.time", lambda: timestamp
+        )
+
+    return setter
+
+
+@pytest.fixture()
+def make_sorted_set_repo(redis_pubsub_server):
+    def maker(**kwargs) -> RedisSortedSetPostRepository:
+        return RedisSortedSetPostRepository(client=redis_pubsub_server, **kwargs)
+
+    return maker
+
+
+async def test_sorted_set_repo_mark_post_as_seen(make_sorted_set_repo):
+    repo = make_sorted_set_repo()
+
+    await repo.mark_post_as_seen("my-stream", "post1", "post2")
+
+    assert await repo.seen_posts_count("my-stream") == 2
+    assert await repo.is_post_seen("post1", "my-stream") is True
+    assert await repo.is_post_seen("post3", "my-stream") is False
+    assert await repo.filter_unseen("my-stream", ["post1", "post3"]) == {"post3"}
+
+
+async def test_sorted_set_repo_trims_posts_not_seen_for_max_age(
+    make_sorted_set_repo, set_time
+):
+    repo = make_sorted_set_repo(max_age=100)
+    set_time(1000)
+    await repo.mark_post_as_seen("my-stream", "post1", "post2")
+    set_time(1050)
+    await repo.mark_post_as_seen("my-stream", "post2", "post3")
+
+    set_time(1101)
+    await repo.mark_post_as_seen("my-stream", "post4")
+
+    assert await repo.filter_unseen("my-stream", ["post1", "post2", "post3"]) == {
+        "post1"
+    }
+
+
+async def test_sorted_set_repo_trims_oldest_posts_over_max_posts(
+    make_sorted_set_repo, set_time
+):
+    repo = make_sorted_set_repo(max_posts=2)
+    set_time(1000)
+    await repo.mark_post_as_seen("my-stream", "post1")
+    set_time(1001)
+    await repo.mark_post_as_seen("my-stream", "post2")
+
+    set_time(1002)
+    await repo.mark_post_as_seen("my-stream", "post3")
+
+    assert await repo.seen_posts_count("my-stream") == 2
+    assert await repo.is_post_seen("post1", "my-stream") is False
+
+
+async def test_sorted_set_repo_keeps_posts_of_feed_bigger_than_max_posts(
+    make_sorted_set_repo, set_time
+):
+    repo = make_sorted_set_repo(max_posts=2)
+    set_time(1000)
+    await repo.mark_post_as_seen("my-stream", "post1")
+
+    set_time(1001)
+    await repo.mark_post_as_seen("my-stream", "post2", "post3", "post4")
+
+    assert await repo.filter_unseen(
+        "my-stream", ["post1", "post2", "post3", "post4"]
+    ) == {"post1"}
+
+
+async def test_migrate_from_set(repo, make_sorted_set_repo):
+    await repo.mark_post_as_seen("my-stream", "post1", "post2")
+    await repo.mark_post_as_seen("other-stream", "post3")
+    sorted_set_repo = make_sorted_set_repo()
+
+    streams = [stream_id async for stream_id in repo.iter_streams_with_seen_posts()]
+    result = await sorted_set_repo.migrate_from_set("my-stream", delete_source=True)
+
+    assert sorted(streams) == ["my-stream", "other-stream"]
+    assert result == 2
+    assert await sorted_set_repo.seen_posts_count("my-stream") == 2
+    assert await repo.seen_posts_count("my-stream") == 0
+
+
+@pytest.fixture()
+def bloom_repo(redis_pubsub_server) -> RedisBloomPostRepository:
+    return RedisBloomPostRepository(
+        client=redis_pubsub_server, capacity=10, error_rate=0.01
+    )
+
+
+async def test_bloom_repo_is_empty_by_default(bloom_repo):
+    assert await bloom_repo.seen_posts_count("my-stream") == 0
+    assert await bloom_repo.is_post_seen("post1", "my-stream") is False
+
+
+async def test_bloom_repo_filter_unseen(bloom_repo):
+    await bloom_repo.mark_post_as_seen("my-stream", "post1", "post3")
+    await bloom_repo.mark_post_as_seen("other-stream", "post2")
+
+    result = await bloom_repo.filter_unseen(
+        "my-stream", ["post1", "post2", "post3", "post4"]
+    )
+
+    assert result == {"post2", "post4"}
+    assert await bloom_repo.is_post_seen("post1", "my-stream") is True
+
+
+async def test_bloom_repo_counts_only_new_posts(bloom_repo):
+    await bloom_repo.mark_post_as_seen("my-stream", "post1", "post2")
+    await bloom_repo.mark_post_as_seen("my-stream", "post2", "post3")
+
+    assert await bloom_repo.seen_posts_count("my-stream") == 3
+
+
+async def test_bloom_repo_grows_over_capacity(bloom_repo):
+    post_ids = [f"post{i}" for i in range(100)]
+    await bloom_repo.mark_post_as_seen("my-stream", *post_ids[:50])
+    await bloom_repo.mark_post_as_seen("my-stream", *post_ids[50:])
+
+    assert await bloom_repo.filter_unseen("my-stream", post_ids) == set()
+    # count is approximate, false positives are not counted
+    assert 95 <= await bloom_repo.seen_posts_count("my-stream") <= 100
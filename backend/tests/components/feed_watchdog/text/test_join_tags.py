@@ -0,0 +1,12 @@
+from feed_watchdog.text import join_tags
+
+
+def test_join_tags():
+    assert join_tags(("Hello world", "python")) == (
+        "Hello world; python",
+        "#hello_world #python",
+    )
+
+
+def test_join_empty_tags():
+    assert join_tags(()) == ("", "")
@@ -112,6 +112,7 @@ async def test_send_events(argv, get_messages):
             "parser_options": {},
             "tags": ["tag1", "tag2"],
         },
+        "probabilistic_dedupe": False,
     }
 
 
@@ -25,6 +25,7 @@ export default function useStreams () {
     receiverSlug: '',
     intervals: [],
     squash: false,
+    probabilisticDedupe: false,
     receiverOptionsOverride: '',
     messageTemplate: '',
     modifiers: [],
@@ -107,6 +108,7 @@ export default function useStreams () {
         receiverSlug: response.data.receiver_slug,
         intervals: response.data.intervals,
         squash: response.data.squash,
+        probabilisticDedupe: response.data.probabilistic_dedupe,
         receiverOptionsOverride: JSON.stringify(response.data.receiver_options_override),
         messageTemplate: response.data.message_template,
         modifiers: response.data.modifiers.map((o: Modifier) => { return { type: o.type, options: JSON.stringify(o.options) } }),
@@ -130,6 +132,7 @@ export default function useStreams () {
         receiver_slug: stream.value.receiverSlug,
         intervals: stream.value.intervals,
         squash: stream.value.squash,
+        probabilistic_dedupe: stream.value.probabilisticDedupe,
         receiver_options_override: JSON.parse(stream.value.receiverOptionsOverride),
         message_template: stream.value.messageTemplate,
         modifiers: stream.value.modifiers.map((o: Modifier) => { return { type: o.type, options: JSON.parse(o.options) } }),
@@ -150,6 +153,7 @@ export default function useStreams () {
         receiver_slug: stream.value.receiverSlug,
         intervals: stream.value.intervals,
         squash: stream.value.squash,
+        probabilistic_dedupe: stream.value.probabilisticDedupe,
         receiver_options_override: JSON.parse(stream.value.receiverOptionsOverride),
         message_template: stream.value.messageTemplate,
         modifiers: stream.value.modifiers.map((o: Modifier) => { return { type: o.type, options: JSON.parse(o.options) } }),
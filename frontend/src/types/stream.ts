@@ -11,6 +11,7 @@ export interface Stream {
   receiverSlug: string
   intervals: string[]
   squash: boolean
+  probabilisticDedupe: boolean
   receiverOptionsOverride: string
   messageTemplate: string
   modifiers: Modifier[]